@@ -0,0 +1,63 @@
+"""Compare batch grade lookups with looping get_grades_for_student_course.
+
+Builds an on-disk database of 10,000 students x 8 courses with one mark per
+assessment kind, then times fetching every (student, course) pair both ways.
+"""
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+import database
+
+NUM_STUDENTS = 10000
+ASSESSMENTS = ["Assignment1", "Lab1", "Test1", "Exam"]
+
+def build_database(path):
+    """Create and fill a database file for the benchmark."""
+    conn = sqlite3.connect(path)
+    database.create_tables(conn)
+    database.populate_courses(conn)
+    course_ids = [row[0] for row in conn.execute("SELECT id FROM courses")]
+    conn.executemany("INSERT INTO students (id, name, sex) VALUES (?, ?, ?)",
+                     [(i, f"Student {i}", "Other") for i in range(1, NUM_STUDENTS + 1)])
+    conn.executemany(
+        "INSERT INTO grades (student_id, course_id, assessment_type, score) VALUES (?, ?, ?, ?)",
+        [(student_id, course_id, assessment, random.uniform(0, 100))
+         for student_id in range(1, NUM_STUDENTS + 1)
+         for course_id in course_ids
+         for assessment in ASSESSMENTS])
+    conn.commit()
+    return conn, course_ids
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        run(os.path.join(directory, "benchmark.db"))
+
+def run(path):
+    conn, course_ids = build_database(path)
+    student_ids = range(1, NUM_STUDENTS + 1)
+
+    start = time.perf_counter()
+    looped = {}
+    for student_id in student_ids:
+        for course_id in course_ids:
+            looped[(student_id, course_id)] = database.get_grades_for_student_course(
+                conn, student_id, course_id)
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = database.get_grades_for_students_courses(conn, student_ids, course_ids)
+    batch_time = time.perf_counter() - start
+
+    assert batched == looped, "Batch lookup returned different grades"
+    pairs = NUM_STUDENTS * len(course_ids)
+    print(f"{pairs} student/course pairs")
+    print(f"Looped single lookups: {loop_time:.3f}s")
+    print(f"Batch lookup:          {batch_time:.3f}s")
+    print(f"Speedup:               {loop_time / batch_time:.1f}x")
+    conn.close()
+
+if __name__ == '__main__':
+    main()
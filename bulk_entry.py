@@ -0,0 +1,97 @@
+"""Bulk mark entry from a block pasted from a spreadsheet.
+
+A block is one student per line with tab- or comma-separated fields: Name, ID
+and then one mark per assessment column, in roster order. A first line that
+starts with "Name" is read as a header giving the column order instead.
+The whole block is parsed and range-checked at once and every problem is
+reported together, so the valid rows can be saved in one roster update.
+"""
+import csv
+
+import numpy as np
+import pandas as pd
+
+import grading
+
+
+def max_mark(column):
+    """Return what an assessment column is marked out of (10 or 100)."""
+    return 100 // grading.ASSESSMENT_WEIGHTS[grading.assessment_kind(column)][1]
+
+
+def _split(line):
+    delimiter = "\t" if "\t" in line else ","
+    return [field.strip() for field in next(csv.reader([line], delimiter=delimiter))]
+
+
+def parse_block(text, mark_columns):
+    """Split a pasted block into (DataFrame of raw strings, column names, errors).
+
+    Rows with the wrong number of fields are reported as errors and left out.
+    Line numbers in errors count from 1 over the non-blank lines of the block.
+    """
+    lines = [line for line in text.splitlines() if line.strip()]
+    columns = ["Name", "ID"] + list(mark_columns)
+    errors = []
+    if lines and _split(lines[0])[0].lower() == "name":
+        # Any spelling of "Name" marks a header; it is the Name column either way.
+        columns = ["Name"] + _split(lines[0])[1:]
+        unknown = [col for col in columns[2:] if col not in mark_columns]
+        if columns[1:2] != ["ID"] or unknown:
+            errors.append("Header must be Name, ID and roster mark columns"
+                          + (f"; unknown: {', '.join(unknown)}" if unknown else ""))
+            columns = ["Name", "ID"] + list(mark_columns)
+            return pd.DataFrame(columns=columns), columns, errors
+        lines = lines[1:]
+        first_line = 2
+    else:
+        first_line = 1
+
+    rows, line_numbers = [], []
+    for number, line in enumerate(lines, start=first_line):
+        fields = _split(line)
+        if len(fields) != len(columns):
+            errors.append(f"Line {number}: expected {len(columns)} fields, got {len(fields)}")
+            continue
+        rows.append(fields)
+        line_numbers.append(number)
+    return pd.DataFrame(rows, columns=columns, index=line_numbers), columns, errors
+
+
+def validate_block(raw):
+    """Range-check every mark in a parsed block at once.
+
+    Returns (valid rows with numeric marks, list of error messages). A row is
+    valid only if its name and ID are present, its ID is not repeated in the
+    block and every mark is a number between 0 and the column's max.
+    """
+    mark_columns = [col for col in raw.columns if col not in ("Name", "ID")]
+    text = raw[mark_columns]
+    marks = text.apply(pd.to_numeric, errors="coerce")
+    limits = np.array([max_mark(col) for col in mark_columns], dtype=np.float64)
+
+    values = marks.to_numpy(dtype=np.float64)
+    blank = (text == "").to_numpy()
+    not_number = np.isnan(values) & ~blank
+    with np.errstate(invalid="ignore"):
+        out_of_range = (values < 0) | (values > limits)
+
+    errors = []
+    for kind, mask in (("is missing", blank), ("is not a number", not_number),
+                       ("is out of range", out_of_range)):
+        for row, col in zip(*np.nonzero(mask)):
+            column = mark_columns[col]
+            errors.append((raw.index[row], col, f"Line {raw.index[row]}, {column}: "
+                           f"'{text.iat[row, col]}' {kind} (0-{max_mark(column)})"))
+
+    missing_key = (raw["Name"] == "") | (raw["ID"] == "")
+    duplicated = raw["ID"].duplicated(keep=False) & ~missing_key
+    for number in raw.index[missing_key]:
+        errors.append((number, -1, f"Line {number}: name and ID are required"))
+    for number in raw.index[duplicated]:
+        errors.append((number, -1, f"Line {number}: ID {raw.at[number, 'ID']} appears more than once"))
+
+    bad_rows = (blank | not_number | out_of_range).any(axis=1) | missing_key.to_numpy() \
+        | duplicated.to_numpy()
+    valid = raw.loc[~bad_rows, ["Name", "ID"]].join(marks.loc[~bad_rows])
+    return valid, [message for _, _, message in sorted(errors)]
@@ -0,0 +1,153 @@
+"""Class-relative grading: percentile ranks, z-scores and curved letter bands.
+
+letter_grade bands a student by fixed percentages. The functions here band by
+position in the class instead. Band cutoffs come from selection-based
+quantiles (np.partition, O(n)) rather than a full sort per cutoff.
+"""
+import numpy as np
+import pandas as pd
+
+# Lowest class percentile (inclusive) for each curved letter, highest first.
+# Anything below the last band is an F.
+CURVE_BANDS = [(90, 'A'), (70, 'B'), (40, 'C'), (20, 'D')]
+
+
+def quantiles(values, percents):
+    """Return the given percentiles of values using linear interpolation.
+
+    Matches np.percentile's default method but selects the needed order
+    statistics with a single np.partition call instead of sorting.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return np.full(len(percents), np.nan)
+    positions = np.asarray(percents, dtype=np.float64) / 100 * (values.size - 1)
+    lower = np.floor(positions).astype(np.intp)
+    upper = np.minimum(lower + 1, values.size - 1)
+    selected = np.partition(values, np.unique(np.concatenate([lower, upper])))
+    fraction = positions - lower
+    return selected[lower] * (1 - fraction) + selected[upper] * fraction
+
+
+def percentile_ranks(values, reference=None):
+    """Return the percentile rank (0-100) of each value within reference.
+
+    A value's rank is the share of reference values below it plus half of
+    those equal to it. reference defaults to values itself; NaNs are ignored
+    in the reference and give NaN ranks.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    reference = values if reference is None else np.asarray(reference, dtype=np.float64)
+    reference = np.sort(reference[~np.isnan(reference)])
+    if reference.size == 0:
+        return np.full(values.shape, np.nan)
+    below = np.searchsorted(reference, values, side="left")
+    at_or_below = np.searchsorted(reference, values, side="right")
+    ranks = (below + at_or_below) / 2 / reference.size * 100
+    return np.where(np.isnan(values), np.nan, ranks)
+
+
+def z_scores(values, mean=None, std=None):
+    """Return (value - mean) / std, using the values' own mean and sample std by default."""
+    values = np.asarray(values, dtype=np.float64)
+    mean = np.nanmean(values) if mean is None else mean
+    std = np.nanstd(values, ddof=1) if std is None else std
+    if not std or np.isnan(std):
+        return np.where(np.isnan(values), np.nan, 0.0)
+    return (values - mean) / std
+
+
+def band_letters(values, cutoffs, bands=None):
+    """Assign letters to values given the score cutoff for each band in bands."""
+    bands = bands or CURVE_BANDS
+    # Ascending cutoffs so searchsorted gives 0 for F up to len(bands) for the top letter.
+    order = np.argsort(cutoffs)
+    letters = np.array(['F'] + [bands[i][1] for i in order], dtype=object)
+    positions = np.searchsorted(np.asarray(cutoffs)[order], np.asarray(values), side="right")
+    result = letters[positions]
+    result[np.isnan(np.asarray(values, dtype=np.float64))] = 'F'
+    return result
+
+
+def curve_letters(values, bands=None):
+    """Return class-relative letters for values, e.g. the top 10% get an A."""
+    bands = bands or CURVE_BANDS
+    cutoffs = quantiles(values, [percent for percent, _ in bands])
+    return band_letters(values, cutoffs, bands)
+
+
+def curve(df, grade_col="Final_Grade", course_col=None, bands=None):
+    """Add Percentile, Z_Score and Curved_Grade columns to df.
+
+    When course_col is given every course is curved on its own; otherwise the
+    whole frame is treated as one class.
+    """
+    groups = df.groupby(course_col).groups.values() if course_col else [df.index]
+    df['Percentile'] = np.nan
+    df['Z_Score'] = np.nan
+    df['Curved_Grade'] = 'F'
+    for index in groups:
+        grades = df.loc[index, grade_col].to_numpy(dtype=np.float64)
+        df.loc[index, 'Percentile'] = percentile_ranks(grades)
+        df.loc[index, 'Z_Score'] = z_scores(grades)
+        df.loc[index, 'Curved_Grade'] = curve_letters(grades, bands)
+    return df
+
+
+class CourseCurve:
+    """Curve a course that arrives one section at a time.
+
+    Add every section's final grades first, then call apply() on each section
+    to get ranks and bands relative to the whole course. Mean and variance are
+    kept as running sums; the grades themselves are kept for the quantiles.
+    """
+
+    def __init__(self, bands=None):
+        self.bands = bands or CURVE_BANDS
+        self._sections = []
+        self._count = 0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._grades = None
+
+    def add(self, grades):
+        """Add one section's final grades to the course."""
+        grades = np.asarray(grades, dtype=np.float64)
+        grades = grades[~np.isnan(grades)]
+        self._sections.append(grades)
+        self._count += grades.size
+        self._sum += grades.sum()
+        self._sum_sq += np.square(grades).sum()
+        self._grades = None
+
+    @property
+    def grades(self):
+        """All grades added so far, as one array."""
+        if self._grades is None:
+            self._grades = (np.concatenate(self._sections) if self._sections
+                            else np.empty(0, dtype=np.float64))
+        return self._grades
+
+    @property
+    def mean(self):
+        return self._sum / self._count if self._count else np.nan
+
+    @property
+    def std(self):
+        if self._count < 2:
+            return np.nan
+        return np.sqrt(max((self._sum_sq - self._count * self.mean ** 2) / (self._count - 1), 0.0))
+
+    def cutoffs(self):
+        """Score cutoffs for each band, computed over every section added."""
+        return quantiles(self.grades, [percent for percent, _ in self.bands])
+
+    def apply(self, grades):
+        """Return a DataFrame of Percentile, Z_Score and Curved_Grade for a section."""
+        grades = np.asarray(grades, dtype=np.float64)
+        return pd.DataFrame({
+            'Percentile': percentile_ranks(grades, self.grades),
+            'Z_Score': z_scores(grades, self.mean, self.std),
+            'Curved_Grade': band_letters(grades, self.cutoffs(), self.bands),
+        })
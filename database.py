@@ -1,13 +1,21 @@
+import json
+import math
 import sqlite3
 from sqlite3 import Error
 
+import grading
+
 DB_FILE = "student_grades.db"
+DEFAULT_BATCH_SIZE = 1000
+# Larger id sets are passed as a JSON array instead of an IN (...) list,
+# keeping both lists together under SQLite's old limit of 999 parameters.
+MAX_IN_PARAMS = 400
 
-def create_connection():
-    """Create a database connection to the SQLite database specified by DB_FILE."""
+def create_connection(db_file=None):
+    """Create a database connection to the SQLite database db_file (DB_FILE by default)."""
     conn = None
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = sqlite3.connect(db_file or DB_FILE)
         return conn
     except Error as e:
         print(e)
@@ -41,10 +49,150 @@ def create_tables(conn):
                 FOREIGN KEY (course_id) REFERENCES courses (id)
             );
         """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_grades_student_course
+            ON grades (student_id, course_id);
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS assessments (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                course_id INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                kind TEXT,
+                max_mark REAL NOT NULL,
+                weight REAL,
+                UNIQUE (course_id, name),
+                FOREIGN KEY (course_id) REFERENCES courses (id)
+            );
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_grades_course_assessment
+            ON grades (course_id, assessment_type);
+        """)
+        create_summary_table(conn)
+        create_change_log(conn)
         conn.commit()
     except Error as e:
         print(e)
 
+def create_summary_table(conn):
+    """Create the per-student course summary table and the triggers that maintain it.
+
+    Each row holds the count, sum and sum of squares of a student's marks for one
+    assessment_type in one course, so averages and spreads can be read without
+    scanning the grades table.
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS student_course_summary (
+            student_id INTEGER NOT NULL,
+            course_id INTEGER NOT NULL,
+            assessment_type TEXT NOT NULL,
+            mark_count INTEGER NOT NULL DEFAULT 0,
+            mark_sum REAL NOT NULL DEFAULT 0,
+            mark_sum_sq REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (student_id, course_id, assessment_type)
+        );
+    """)
+    add_mark = """
+        INSERT OR IGNORE INTO student_course_summary (student_id, course_id, assessment_type)
+        VALUES (NEW.student_id, NEW.course_id, NEW.assessment_type);
+        UPDATE student_course_summary
+        SET mark_count = mark_count + 1,
+            mark_sum = mark_sum + NEW.score,
+            mark_sum_sq = mark_sum_sq + NEW.score * NEW.score
+        WHERE student_id = NEW.student_id AND course_id = NEW.course_id
+          AND assessment_type = NEW.assessment_type;
+    """
+    remove_mark = """
+        UPDATE student_course_summary
+        SET mark_count = mark_count - 1,
+            mark_sum = mark_sum - OLD.score,
+            mark_sum_sq = mark_sum_sq - OLD.score * OLD.score
+        WHERE student_id = OLD.student_id AND course_id = OLD.course_id
+          AND assessment_type = OLD.assessment_type;
+        DELETE FROM student_course_summary
+        WHERE student_id = OLD.student_id AND course_id = OLD.course_id
+          AND assessment_type = OLD.assessment_type AND mark_count <= 0;
+    """
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS grades_summary_insert AFTER INSERT ON grades
+        BEGIN {add_mark} END;
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS grades_summary_delete AFTER DELETE ON grades
+        BEGIN {remove_mark} END;
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS grades_summary_update AFTER UPDATE ON grades
+        BEGIN {remove_mark} {add_mark} END;
+    """)
+
+# Columns recorded in the change log for each tracked table.
+TRACKED_TABLES = {
+    "students": ["id", "name", "sex"],
+    "grades": ["id", "student_id", "course_id", "assessment_type", "score"],
+}
+
+def create_change_log(conn):
+    """Create the change_log table and the triggers that fill it.
+
+    Every insert, update and delete on a tracked table appends a row with a
+    monotonically increasing seq (AUTOINCREMENT never reuses values), the
+    operation, the row id and the row's new values as JSON (NULL for deletes).
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            op TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            data TEXT,
+            changed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_change_log_row
+        ON change_log (table_name, row_id, seq);
+    """)
+    for table, columns in TRACKED_TABLES.items():
+        new_row = "json_object(" + ", ".join(f"'{col}', NEW.{col}" for col in columns) + ")"
+        for op, event, row, data in (("insert", "INSERT", "NEW", new_row),
+                                     ("update", "UPDATE", "NEW", new_row),
+                                     ("delete", "DELETE", "OLD", "NULL")):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_change_log_{op} AFTER {event} ON {table}
+                BEGIN
+                    INSERT INTO change_log (table_name, op, row_id, data)
+                    VALUES ('{table}', '{op}', {row}.id, {data});
+                END;
+            """)
+
+def rebuild_course_summary(conn):
+    """Recompute student_course_summary from the grades table.
+
+    Use this once on databases created before the summary table existed, or if
+    the summary is ever suspected to have drifted from the marks.
+    """
+    try:
+        create_summary_table(conn)
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM student_course_summary")
+        cursor.execute("""
+            INSERT INTO student_course_summary
+                (student_id, course_id, assessment_type, mark_count, mark_sum, mark_sum_sq)
+            SELECT student_id, course_id, assessment_type,
+                   COUNT(*), SUM(score), SUM(score * score)
+            FROM grades
+            GROUP BY student_id, course_id, assessment_type
+        """)
+        conn.commit()
+        return cursor.rowcount
+    except Error as e:
+        print(e)
+        return None
+
 def populate_courses(conn):
     """Populate the courses table with the predefined list of courses."""
     courses = [
@@ -93,6 +241,110 @@ def get_all_students(conn):
     except Error as e:
         print(e)
 
+def _check_batch_size(batch_size):
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+
+def iter_students(conn, batch_size=DEFAULT_BATCH_SIZE, after_id=None):
+    """Yield students one at a time, reading them in pages of batch_size.
+
+    Uses keyset pagination on the student id, so memory stays constant and each
+    page is an index range scan regardless of how far into the table it is.
+    Pass after_id to resume after the last student seen.
+    """
+    _check_batch_size(batch_size)
+    last_id = after_id
+    while True:
+        cursor = conn.cursor()
+        if last_id is None:
+            cursor.execute("SELECT * FROM students ORDER BY id LIMIT ?", (batch_size,))
+        else:
+            cursor.execute("SELECT * FROM students WHERE id > ? ORDER BY id LIMIT ?",
+                           (last_id, batch_size))
+        rows = cursor.fetchall()
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        last_id = rows[-1][0]
+
+def _iter_grade_pages(conn, batch_size, after_id, course_id):
+    """Yield pages of grade rows using keyset pagination on the grade id."""
+    _check_batch_size(batch_size)
+    last_id = after_id if after_id is not None else 0
+    course_filter = "" if course_id is None else " AND course_id = ?"
+    sql = ("SELECT id, student_id, course_id, assessment_type, score FROM grades "
+           f"WHERE id > ?{course_filter} ORDER BY id LIMIT ?")
+    while True:
+        params = (last_id,) if course_id is None else (last_id, course_id)
+        cursor = conn.cursor()
+        cursor.execute(sql, params + (batch_size,))
+        rows = cursor.fetchall()
+        if rows:
+            yield rows
+        if len(rows) < batch_size:
+            return
+        last_id = rows[-1][0]
+
+def iter_grades(conn, batch_size=DEFAULT_BATCH_SIZE, after_id=None, course_id=None):
+    """Yield (id, student_id, course_id, assessment_type, score) rows in pages of batch_size.
+
+    Pages are fetched with keyset pagination on the grade id, optionally limited
+    to a single course.
+    """
+    for page in _iter_grade_pages(conn, batch_size, after_id, course_id):
+        yield from page
+
+def stream_grades_for_student_course(conn, student_id, course_id, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield (assessment_type, score) for a student in a course using fetchmany."""
+    _check_batch_size(batch_size)
+    cursor = conn.cursor()
+    cursor.execute("SELECT assessment_type, score FROM grades WHERE student_id=? AND course_id=?",
+                   (student_id, course_id))
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+GRADE_COLUMNS = ["id", "student_id", "course_id", "assessment_type", "score"]
+
+def iter_grade_chunks(conn, batch_size=DEFAULT_BATCH_SIZE, course_id=None, as_="rows"):
+    """Yield the grades table in chunks of at most batch_size rows.
+
+    as_ selects the chunk type:
+      "rows"      - a list of tuples
+      "numpy"     - a dict of NumPy arrays, one per column in GRADE_COLUMNS;
+                    student_id and course_id are masked arrays, as they may be NULL
+      "dataframe" - a pandas DataFrame with GRADE_COLUMNS
+    NumPy and pandas are only imported when asked for.
+    """
+    if as_ == "rows":
+        yield from _iter_grade_pages(conn, batch_size, None, course_id)
+    elif as_ == "numpy":
+        import numpy as np  # pylint: disable=import-outside-toplevel
+
+        def nullable_ids(values):
+            mask = np.fromiter((value is None for value in values), dtype=bool, count=len(values))
+            data = np.fromiter((0 if value is None else value for value in values),
+                               dtype=np.int64, count=len(values))
+            return np.ma.masked_array(data, mask=mask)
+
+        for page in _iter_grade_pages(conn, batch_size, None, course_id):
+            ids, students, courses, types, scores = zip(*page)
+            yield {
+                "id": np.fromiter(ids, dtype=np.int64, count=len(page)),
+                "student_id": nullable_ids(students),
+                "course_id": nullable_ids(courses),
+                "assessment_type": np.array(types, dtype=object),
+                "score": np.fromiter(scores, dtype=np.float64, count=len(page)),
+            }
+    elif as_ == "dataframe":
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+        for page in _iter_grade_pages(conn, batch_size, None, course_id):
+            yield pd.DataFrame.from_records(page, columns=GRADE_COLUMNS)
+    else:
+        raise ValueError(f"Unknown chunk type '{as_}'")
+
 def add_grade(conn, student_id, course_id, assessment_type, score):
     """Add a new grade for a student in a specific course."""
     sql = ''' INSERT INTO grades(student_id, course_id, assessment_type, score)
@@ -115,3 +367,314 @@ def get_grades_for_student_course(conn, student_id, course_id):
         return rows
     except Error as e:
         print(e)
+
+def get_student_course_averages(conn, student_id, course_id):
+    """Return (assessment_type, count, average) for a student in a course, from the summary table."""
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT assessment_type, mark_count, mark_sum / mark_count
+            FROM student_course_summary
+            WHERE student_id=? AND course_id=? AND mark_count > 0
+            ORDER BY assessment_type
+        """, (student_id, course_id))
+        return cursor.fetchall()
+    except Error as e:
+        print(e)
+
+def get_final_grades(conn, course_id, weights=None):
+    """Return {student_id: final percentage} for every student with marks in a course.
+
+    Each assessment's average mark is turned into a percentage using its
+    catalog max_mark, or the max for its kind if it is not in the catalog.
+    Assessments with their own catalog weight count with that weight on their
+    own. The rest are pooled per kind (the catalog kind, else the one its name
+    parses to) and weighted with grading.ASSESSMENT_WEIGHTS unless other
+    weights are given. Uncatalogued names that do not match a kind are ignored.
+    """
+    weights = weights or grading.ASSESSMENT_WEIGHTS
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT s.student_id, s.assessment_type, s.mark_count, s.mark_sum,
+                   a.kind, a.max_mark, a.weight
+            FROM student_course_summary AS s
+            LEFT JOIN assessments AS a
+                ON a.course_id = s.course_id AND a.name = s.assessment_type
+            WHERE s.course_id=? AND s.mark_count > 0
+        """, (course_id,))
+        kind_totals, finals = {}, {}
+        for student_id, assessment_type, count, total, kind, max_mark, weight in cursor:
+            kind = kind or grading.assessment_kind(assessment_type)
+            if max_mark is None:
+                if kind not in weights:
+                    continue
+                max_mark = 100 / weights[kind][1]
+            percent_sum = total * 100 / max_mark
+            finals.setdefault(student_id, 0.0)
+            if weight is not None:
+                finals[student_id] += percent_sum / count * weight
+            elif kind in weights:
+                kinds = kind_totals.setdefault(student_id, {})
+                kind_count, kind_sum = kinds.get(kind, (0, 0.0))
+                kinds[kind] = (kind_count + count, kind_sum + percent_sum)
+        for student_id, kinds in kind_totals.items():
+            finals[student_id] += grading.final_grade(
+                {kind: percent_sum / count for kind, (count, percent_sum) in kinds.items()},
+                weights)
+        return finals
+    except Error as e:
+        print(e)
+
+def get_course_statistics(conn, course_id):
+    """Return {assessment_type: (count, mean, stdev)} across all students in a course.
+
+    The standard deviation is the sample standard deviation, or 0.0 when there
+    is a single mark.
+    """
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT assessment_type, SUM(mark_count), SUM(mark_sum), SUM(mark_sum_sq)
+            FROM student_course_summary
+            WHERE course_id=?
+            GROUP BY assessment_type
+            HAVING SUM(mark_count) > 0
+        """, (course_id,))
+        stats = {}
+        for assessment_type, count, total, total_sq in cursor:
+            mean = total / count
+            variance = (total_sq - count * mean * mean) / (count - 1) if count > 1 else 0.0
+            stats[assessment_type] = (count, mean, math.sqrt(max(variance, 0.0)))
+        return stats
+    except Error as e:
+        print(e)
+
+BATCH_GRADE_COLUMNS = ["student_id", "course_id", "assessment_type", "score"]
+
+def _id_filter(column, ids):
+    """Build a SQL condition restricting column to ids.
+
+    Small sets become an IN (...) list. Sets larger than MAX_IN_PARAMS are
+    passed as one JSON array and expanded with json_each, so the lookup stays
+    a single read-only statement.
+    """
+    if len(ids) <= MAX_IN_PARAMS:
+        return f"{column} IN ({','.join('?' * len(ids))})", ids
+    return f"{column} IN (SELECT value FROM json_each(?))", [json.dumps(ids)]
+
+def get_grades_for_students_courses(conn, student_ids=None, course_ids=None, as_frame=False):
+    """Query grades for many students and/or courses with one query.
+
+    Either argument may be None to mean "all". Returns a dict mapping
+    (student_id, course_id) to a list of (assessment_type, score), or a pandas
+    DataFrame with student_id, course_id, assessment_type and score columns
+    when as_frame is True.
+    """
+    filters = [(column, list(set(ids)))
+               for column, ids in (("student_id", student_ids), ("course_id", course_ids))
+               if ids is not None]
+    conditions, params, rows = [], [], []
+    try:
+        if all(ids for _, ids in filters):
+            for column, ids in filters:
+                condition, condition_params = _id_filter(column, ids)
+                conditions.append(condition)
+                params.extend(condition_params)
+            where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+            cursor = conn.cursor()
+            cursor.execute("SELECT student_id, course_id, assessment_type, score FROM grades"
+                           f"{where}", params)
+            rows = cursor.fetchall()
+    except Error as e:
+        print(e)
+        return None
+
+    if as_frame:
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+        return pd.DataFrame.from_records(rows, columns=BATCH_GRADE_COLUMNS)
+    grades = {}
+    for student_id, course_id, assessment_type, score in rows:
+        key = (student_id, course_id)
+        if key in grades:
+            grades[key].append((assessment_type, score))
+        else:
+            grades[key] = [(assessment_type, score)]
+    return grades
+
+def add_assessment(conn, course_id, name, max_mark=None, weight=None, kind=None):
+    """Add an assessment to a course's catalog and return its id.
+
+    kind defaults to the prefix of name (Assignment, Lab, Test, Exam) and
+    max_mark to what that kind is marked out of. With weight left as None the
+    assessment is pooled with its kind and shares the kind's weight from
+    grading.ASSESSMENT_WEIGHTS; otherwise it counts on its own with weight.
+    An assessment needs a known kind or its own weight to count towards the
+    final grade. Adding one only inserts a catalog row; no marks are touched.
+    """
+    kind = kind or grading.assessment_kind(name)
+    if kind not in grading.ASSESSMENT_WEIGHTS and weight is None:
+        print(f"Error: '{name}' is not an Assignment, Lab, Test or Exam; "
+              "give its kind or its own weight.")
+        return None
+    if max_mark is None:
+        scale = grading.ASSESSMENT_WEIGHTS[kind][1] if kind in grading.ASSESSMENT_WEIGHTS else 1
+        max_mark = 100 / scale
+    sql = ''' INSERT INTO assessments(course_id, name, kind, max_mark, weight)
+              VALUES(?,?,?,?,?) '''
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql, (course_id, name, kind, max_mark, weight))
+        conn.commit()
+        return cursor.lastrowid
+    except Error as e:
+        print(e)
+        return None
+
+def get_assessments(conn, course_id):
+    """Query the catalog for a course: (id, name, kind, max_mark, weight) rows."""
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, name, kind, max_mark, weight FROM assessments "
+                       "WHERE course_id=? ORDER BY id", (course_id,))
+        return cursor.fetchall()
+    except Error as e:
+        print(e)
+
+def record_mark(conn, student_id, assessment_id, score):
+    """Record a student's mark for a catalogued assessment.
+
+    The mark is checked against the assessment's max_mark and stored as one
+    row in the grades table, so only marks that exist take up space.
+    """
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT course_id, name, max_mark FROM assessments WHERE id=?",
+                       (assessment_id,))
+        assessment = cursor.fetchone()
+    except Error as e:
+        print(e)
+        return None
+    if assessment is None:
+        print(f"Unknown assessment id {assessment_id}")
+        return None
+    course_id, name, max_mark = assessment
+    if not 0 <= score <= max_mark:
+        print(f"Error: mark must be between 0 and {max_mark:g}. You entered {score}.")
+        return None
+    return add_grade(conn, student_id, course_id, name, score)
+
+def get_wide_marks(conn, course_id, assessment_names=None, as_frame=False):
+    """Build a student x assessment view of a course's marks on demand.
+
+    Only the requested assessments are read (all catalogued ones by default).
+    Returns {student_id: {assessment name: score}}, or a pandas DataFrame
+    indexed by student_id with one column per requested assessment when
+    as_frame is True. If a student has several marks for one assessment the
+    latest is used.
+    """
+    if assessment_names is None:
+        assessment_names = [row[1] for row in get_assessments(conn, course_id) or []]
+    assessment_names = list(assessment_names)
+    wide = {}
+    try:
+        cursor = conn.cursor()
+        for names in (assessment_names[i:i + MAX_IN_PARAMS]
+                      for i in range(0, len(assessment_names), MAX_IN_PARAMS)):
+            cursor.execute(
+                "SELECT student_id, assessment_type, score FROM grades "
+                f"WHERE course_id=? AND assessment_type IN ({','.join('?' * len(names))}) "
+                "ORDER BY id", [course_id] + names)
+            for student_id, name, score in cursor:
+                wide.setdefault(student_id, {})[name] = score
+    except Error as e:
+        print(e)
+        return None
+
+    if as_frame:
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+        frame = pd.DataFrame.from_dict(wide, orient="index", columns=assessment_names)
+        frame.index.name = "student_id"
+        return frame.sort_index()
+    return wide
+
+def _change_from_row(row):
+    seq, table_name, op, row_id, data, changed_at = row
+    return {
+        "seq": seq,
+        "table": table_name,
+        "op": op,
+        "row_id": row_id,
+        "data": json.loads(data) if data is not None else None,
+        "changed_at": changed_at,
+    }
+
+def iter_changes(conn, since=0, batch_size=DEFAULT_BATCH_SIZE, compact=False):
+    """Yield changes with seq greater than since, oldest first, as dicts.
+
+    Changes are read in batches with keyset pagination on seq. With compact,
+    only the latest change to each row (as of when iteration starts) is
+    yielded, so a consumer catching up skips intermediate versions.
+    """
+    _check_batch_size(batch_size)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log")
+        upto = cursor.fetchone()[0]
+    except Error as e:
+        print(e)
+        return
+    latest_only = """
+        AND seq = (SELECT MAX(seq) FROM change_log AS later
+                   WHERE later.table_name = change_log.table_name
+                     AND later.row_id = change_log.row_id AND later.seq <= ?)
+    """ if compact else ""
+    sql = ("SELECT seq, table_name, op, row_id, data, changed_at FROM change_log "
+           f"WHERE seq > ? AND seq <= ? {latest_only} ORDER BY seq LIMIT ?")
+    last_seq = since
+    while True:
+        params = (last_seq, upto) + ((upto,) if compact else ()) + (batch_size,)
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+        for row in rows:
+            yield _change_from_row(row)
+        if len(rows) < batch_size:
+            return
+        last_seq = rows[-1][0]
+
+def export_changes_jsonl(conn, out, since=0, batch_size=DEFAULT_BATCH_SIZE, compact=False):
+    """Write changes after since to the file object out, one JSON object per line.
+
+    Returns the cursor to pass as since next time (the last seq written, or
+    since itself if there was nothing new).
+    """
+    cursor = since
+    for change in iter_changes(conn, since, batch_size, compact):
+        out.write(json.dumps(change) + "\n")
+        cursor = change["seq"]
+    return cursor
+
+def compact_change_log(conn, upto=None):
+    """Delete changes superseded by a later change to the same row.
+
+    Only entries with seq <= upto are removed (all by default), so the latest
+    state of every row, including deletions, stays in the log and a consumer
+    starting from 0 can still rebuild it. Returns the number of rows deleted.
+    """
+    try:
+        cursor = conn.cursor()
+        if upto is None:
+            cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log")
+            upto = cursor.fetchone()[0]
+        cursor.execute("""
+            DELETE FROM change_log
+            WHERE seq <= ? AND seq < (SELECT MAX(seq) FROM change_log AS later
+                                      WHERE later.table_name = change_log.table_name
+                                        AND later.row_id = change_log.row_id)
+        """, (upto,))
+        conn.commit()
+        return cursor.rowcount
+    except Error as e:
+        print(e)
+        return None
@@ -0,0 +1,49 @@
+"""Shared grading rules used by the scripts and the database layer."""
+import re
+
+# Each assessment kind maps to (weight in the final grade, scale to a percentage).
+# Assignments and labs are marked out of 10, tests and the exam out of 100.
+ASSESSMENT_WEIGHTS = {
+    "Assignment": (0.15, 10),
+    "Lab": (0.15, 10),
+    "Test": (0.30, 1),
+    "Exam": (0.40, 1),
+}
+
+# Lower bound (inclusive) for each letter, highest first.
+GRADE_CUTOFFS = [(80, 'A'), (70, 'B'), (60, 'C'), (50, 'D')]
+
+
+def letter_grade(score):
+    """Convert a final percentage into a letter grade."""
+    for cutoff, letter in GRADE_CUTOFFS:
+        if score >= cutoff:
+            return letter
+    return 'F'
+
+
+# An assessment name is its kind, optionally followed by a number: "Lab2", "Exam".
+_ASSESSMENT_NAME = re.compile(rf"^({'|'.join(ASSESSMENT_WEIGHTS)})\d*$")
+
+
+def assessment_kind(assessment_type):
+    """Return the kind ('Assignment', 'Lab', ...) an assessment name belongs to, or None."""
+    match = _ASSESSMENT_NAME.match(assessment_type)
+    return match.group(1) if match else None
+
+
+def final_grade(kind_percentages, weights=None):
+    """Combine per-kind average marks, as percentages, into a final percentage.
+
+    kind_percentages maps an assessment kind to its average mark scaled to a
+    percentage. Kinds that are absent or None add nothing, so a student missing
+    a kind is graded as if they scored 0 on it. (The scripts instead give such
+    a student a NaN final grade.)
+    """
+    weights = weights or ASSESSMENT_WEIGHTS
+    total = 0.0
+    for kind, (weight, _) in weights.items():
+        percentage = kind_percentages.get(kind)
+        if percentage is not None:
+            total += percentage * weight
+    return total
@@ -1,18 +1,20 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 from statistics import mean, median, mode, stdev
 
+import roster_meta
+
 RAW_FILE = "students_raw.csv"
 RESULT_FILE = "students_results.csv"
 
 # --- Step 1: Read data ---
-df = pd.read_csv(RAW_FILE)
+roster = roster_meta.open_roster(RAW_FILE)
+df = roster.frame()
 
 # --- Step 2: Calculate averages & grades ---
-df['Avg_Assignments'] = df[[col for col in df.columns if 'Assignment' in col]].mean(axis=1)
-df['Avg_Labs'] = df[[col for col in df.columns if 'Lab' in col]].mean(axis=1)
-df['Avg_Tests'] = df[[col for col in df.columns if 'Test' in col]].mean(axis=1)
+df['Avg_Assignments'] = df[roster.assignment_cols].mean(axis=1)
+df['Avg_Labs'] = df[roster.lab_cols].mean(axis=1)
+df['Avg_Tests'] = df[roster.test_cols].mean(axis=1)
 
 df['Final_Grade'] = (
     (df['Avg_Assignments'] * 10) * 0.15 +
@@ -1,9 +1,15 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import os
 
+import bulk_entry
+import curving
+import roster_meta
+import roster_sync
+
 RAW_FILE = "students_raw.csv"
 RESULT_FILE = "students_results.csv"
+# "absolute" uses the fixed cutoffs in letter_grade; "curve" bands students by class percentile
+GRADING_MODE = "absolute"
 
 # ---------- STEP 1: Ensure starter CSV exists ----------
 if not os.path.exists(RAW_FILE):
@@ -23,6 +29,76 @@ def get_valid_mark(prompt, max_mark):
         except ValueError:
             print("Error: please enter a number.")
 
+def find_row_key(roster_rows, student_id, name):
+    """Return the roster key of an existing student (by ID, else name), or student_id if new."""
+    if student_id in roster_rows:
+        return student_id
+    return next((key for key, row in roster_rows.items()
+                 if row["Name"].lower() == name.lower()), student_id)
+
+def id_clash(roster_rows, student_id, name):
+    """Return why an ID and a name point at two different students, or None if they do not."""
+    owner = roster_rows.get(student_id)
+    if owner is None or owner["Name"].lower() == name.lower():
+        return None
+    other = next((key for key, row in roster_rows.items()
+                  if row["Name"].lower() == name.lower()), None)
+    if other is None:
+        return None
+    return f"ID {student_id} already belongs to {owner['Name']}, but {name} has ID {other}"
+
+def enter_bulk_marks(roster_rows, roster_versions, mark_cols):
+    """Read a pasted block of marks, report every error and save the valid rows at once."""
+    print("Paste one student per line: Name, ID, " + ", ".join(mark_cols))
+    print("(tab- or comma-separated; a 'Name,ID,...' header line may set the order).")
+    print("Finish with an empty line.")
+    lines = []
+    while True:
+        line = input()
+        if not line.strip():
+            break
+        lines.append(line)
+
+    raw, _, errors = bulk_entry.parse_block("\n".join(lines), mark_cols)
+    valid, mark_errors = bulk_entry.validate_block(raw)
+    errors += mark_errors
+
+    # Rows with different IDs can still match one existing student by name
+    matches = {}
+    for line, row in valid.to_dict("index").items():
+        row_key = find_row_key(roster_rows, row["ID"], row["Name"])
+        clash = id_clash(roster_rows, row["ID"], row["Name"])
+        if clash:
+            errors.append(f"Line {line}: {clash}")
+            valid = valid.drop(index=line)
+            continue
+        matches.setdefault(row_key, []).append(line)
+    for row_key, lines_for_key in matches.items():
+        if len(lines_for_key) > 1:
+            numbers = ", ".join(str(line) for line in lines_for_key)
+            errors.append(f"Lines {numbers}: all match the existing student with ID {row_key}")
+            valid = valid.drop(index=lines_for_key)
+
+    if errors:
+        print(f"\n{len(errors)} problem(s) found; these rows were skipped:")
+        for error in errors:
+            print(f"  {error}")
+    if valid.empty:
+        print("No valid rows to save.")
+        return
+
+    changes, base_versions = {}, {}
+    for row in valid.to_dict("records"):
+        row_key = find_row_key(roster_rows, row["ID"], row["Name"])
+        changes[row_key] = row
+        base_versions[row_key] = roster_versions.get(row_key)
+    try:
+        roster_sync.save_rows(RAW_FILE, changes, base_versions)
+    except (roster_sync.RosterConflictError, roster_sync.RosterKeyError) as e:
+        print(f"Nothing saved: {e}. Please paste the block again.")
+        return
+    print(f"Saved marks for {len(changes)} student(s)!\n")
+
 def letter_grade(score):
     if score >= 80: return 'A'
     elif score >= 70: return 'B'
@@ -30,11 +106,12 @@ def letter_grade(score):
     elif score >= 50: return 'D'
     return 'F'
 
-def process_and_save(df):
+def process_and_save(roster):
     """Processes grades, saves results, and exports graphs."""
-    assignment_cols = [col for col in df.columns if col.startswith("Assignment")]
-    lab_cols = [col for col in df.columns if col.startswith("Lab")]
-    test_cols = [col for col in df.columns if col.startswith("Test")]
+    df = roster.frame()
+    assignment_cols = roster.assignment_cols
+    lab_cols = roster.lab_cols
+    test_cols = roster.test_cols
 
     df['Avg_Assignments'] = df[assignment_cols].mean(axis=1)
     df['Avg_Labs'] = df[lab_cols].mean(axis=1)
@@ -47,7 +124,11 @@ def process_and_save(df):
         (df['Exam']) * 0.40
     )
 
-    df['Letter_Grade'] = df['Final_Grade'].apply(letter_grade)
+    if GRADING_MODE == "curve":
+        curving.curve(df)
+        df['Letter_Grade'] = df['Curved_Grade']
+    else:
+        df['Letter_Grade'] = df['Final_Grade'].apply(letter_grade)
 
     # Save results CSV
     df.to_csv(RESULT_FILE, index=False)
@@ -103,26 +184,36 @@ def process_and_save(df):
     print("\nCharts saved: 'grade_distribution.png', 'letter_grade_pie.png', 'class_trend_line.png'")
 
 # ---------- MAIN LOOP ----------
+bulk_mode = input("Paste marks for many students at once this session? (y/n): ").strip().lower() == 'y'
+
 while True:
-    df_existing = pd.read_csv(RAW_FILE)
+    _, roster_rows, roster_versions = roster_sync.read_roster(RAW_FILE)
 
-    # Detect columns
-    assignment_cols = [col for col in df_existing.columns if col.startswith("Assignment")]
-    lab_cols = [col for col in df_existing.columns if col.startswith("Lab")]
-    test_cols = [col for col in df_existing.columns if col.startswith("Test")]
+    # Columns come from the roster's metadata sidecar
+    roster = roster_meta.open_roster(RAW_FILE)
+    assignment_cols = roster.assignment_cols
+    lab_cols = roster.lab_cols
+    test_cols = roster.test_cols
 
     print("\n--- STUDENT INFORMATION ENTRY ---")
+    if bulk_mode:
+        enter_bulk_marks(roster_rows, roster_versions,
+                         assignment_cols + lab_cols + test_cols + ["Exam"])
+        cont = input("Do you want to enter more students? (y/n): ").strip().lower()
+        if cont != 'y':
+            process_and_save(roster_meta.open_roster(RAW_FILE))
+            break
+        continue
+
     name = input("Enter the full name of the student: ")
     student_id = input("Enter the student's ID: ")
 
-    # Check if student exists
-    student_mask = (df_existing["ID"] == student_id) | (df_existing["Name"].str.lower() == name.lower())
-    student_exists = df_existing[student_mask].shape[0] > 0
-
-    # Ensure CSV has required columns
-    for col in assignment_cols + lab_cols + test_cols + ["Exam"]:
-        if col not in df_existing.columns:
-            df_existing[col] = None
+    # Find the row being edited, as other sessions may be writing to the roster too
+    row_key = find_row_key(roster_rows, student_id, name)
+    clash = id_clash(roster_rows, student_id, name)
+    if clash:
+        print(f"Not saved: {clash}. Please check the ID.")
+        continue
 
     # Input marks for existing columns only
     assignments = [get_valid_mark(f"  {col} (out of 10): ", 10) for col in assignment_cols]
@@ -130,23 +221,27 @@ while True:
     tests = [get_valid_mark(f"  {col} (out of 100): ", 100) for col in test_cols]
     exam = get_valid_mark("  Final Exam (out of 100): ", 100)
 
-    # Add or update student
-    if student_exists:
+    if row_key in roster_rows:
         print(f"Updating existing record for {name}...")
-        df_existing.loc[student_mask, ["Name", "ID"] + assignment_cols + lab_cols + test_cols + ["Exam"]] = \
-            [name, student_id] + assignments + labs + tests + [exam]
-    else:
-        new_row = dict(zip(["Name", "ID"] + assignment_cols + lab_cols + test_cols + ["Exam"],
-                           [name, student_id] + assignments + labs + tests + [exam]))
-        df_existing = pd.concat([df_existing, pd.DataFrame([new_row])], ignore_index=True)
-
-    # Save updated CSV
-    df_existing.to_csv(RAW_FILE, index=False)
+    new_row = dict(zip(["Name", "ID"] + assignment_cols + lab_cols + test_cols + ["Exam"],
+                       [name, student_id] + assignments + labs + tests + [exam]))
+
+    # Merge only this student's row into the current CSV
+    try:
+        roster_sync.save_rows(RAW_FILE, {row_key: new_row},
+                              {row_key: roster_versions.get(row_key)})
+    except roster_sync.RosterConflictError:
+        print(f"{name}'s record was changed by another session while you were typing. "
+              "Please enter their marks again.")
+        continue
+    except roster_sync.RosterKeyError as e:
+        print(f"Not saved: {e}.")
+        continue
     print("Student data saved!\n")
 
     # Continue?
     cont = input("Do you want to enter another student? (y/n): ").strip().lower()
     if cont != 'y':
-        process_and_save(df_existing)
+        process_and_save(roster_meta.open_roster(RAW_FILE))
         break
 
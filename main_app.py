@@ -1,3 +1,6 @@
+import argparse
+import sys
+
 import database
 
 def initialize_database():
@@ -15,7 +18,73 @@ def initialize_database():
     else:
         print("Error! Cannot create the database connection.")
 
+def rebuild_summary():
+    """
+    Recomputes the per-student course summary table from existing grades.
+    Run this once on databases created before the summary table was added.
+    """
+    conn = database.create_connection()
+    if conn is not None:
+        rows = database.rebuild_course_summary(conn)
+        conn.close()
+        print(f"Course summary rebuilt ({rows} rows).")
+    else:
+        print("Error! Cannot create the database connection.")
+
+def export_changes(since, batch_size, compact, output):
+    """
+    Writes grade and student changes after the given cursor as JSON lines,
+    then reports the cursor to use for the next export.
+    """
+    conn = database.create_connection()
+    if conn is None:
+        print("Error! Cannot create the database connection.")
+        return
+    if output == "-":
+        cursor = database.export_changes_jsonl(conn, sys.stdout, since, batch_size, compact)
+    else:
+        with open(output, "w", encoding="utf-8") as out:
+            cursor = database.export_changes_jsonl(conn, out, since, batch_size, compact)
+    conn.close()
+    print(f"Next cursor: {cursor}", file=sys.stderr)
+
+def compact_changes(upto):
+    """
+    Removes change log entries that a later change to the same row supersedes.
+    """
+    conn = database.create_connection()
+    if conn is not None:
+        removed = database.compact_change_log(conn, upto)
+        conn.close()
+        print(f"Change log compacted ({removed} entries removed).")
+    else:
+        print("Error! Cannot create the database connection.")
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Manage the student grades database.")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("init", help="create tables and courses (default)")
+    commands.add_parser("rebuild-summary", help="recompute the per-student course summary")
+    changes = commands.add_parser("changes", help="export changes since a cursor as JSON lines")
+    changes.add_argument("--since", type=int, default=0, help="last cursor already consumed")
+    changes.add_argument("--batch-size", type=int, default=database.DEFAULT_BATCH_SIZE)
+    changes.add_argument("--compact", action="store_true",
+                         help="only the latest change to each row")
+    changes.add_argument("--output", default="-", help="file to write (default stdout)")
+    compact = commands.add_parser("compact-changes", help="drop superseded change log entries")
+    compact.add_argument("--upto", type=int, default=None,
+                         help="only compact entries up to this cursor")
+    return parser
+
 if __name__ == '__main__':
     # This block will run when the script is executed directly.
-    # It sets up the database.
-    initialize_database()
+    # With no arguments it sets up the database.
+    args = build_parser().parse_args()
+    if args.command == "rebuild-summary":
+        rebuild_summary()
+    elif args.command == "changes":
+        export_changes(args.since, args.batch_size, args.compact, args.output)
+    elif args.command == "compact-changes":
+        compact_changes(args.upto)
+    else:
+        initialize_database()
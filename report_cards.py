@@ -0,0 +1,243 @@
+"""Per-student report cards rendered in parallel.
+
+Reads the results CSV written by process_and_save and renders one HTML (or
+PDF) report per student with their marks, final grade, class percentile, a
+sparkline of their assessments and the class grade histogram. Class-level data
+is computed once and handed to each worker when it starts, not per report.
+
+Usage:
+    python report_cards.py [students_results.csv] [--format html|pdf] [--workers N]
+"""
+import argparse
+import html
+import os
+import re
+from multiprocessing import Pool
+from string import Template
+
+import numpy as np
+import pandas as pd
+
+import curving
+import grading
+
+RESULT_FILE = "students_results.csv"
+OUTPUT_TEMPLATE = "reports/{ID}_{Name}.{ext}"
+HISTOGRAM_BINS = np.linspace(0, 100, 11)
+# Shown instead of a final grade or percentile the student does not have.
+MISSING = "\u2014"
+
+PAGE = Template("""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Report card - $name</title>
+<style>
+body { font-family: sans-serif; margin: 2em; }
+table { border-collapse: collapse; }
+td, th { border: 1px solid #ccc; padding: 4px 10px; text-align: right; }
+</style></head>
+<body>
+<h1>$name</h1>
+<p>Student ID: $student_id</p>
+<h2>Final grade: $final ($letter)</h2>
+<p>Class percentile: $percentile</p>
+<h3>Assessments</h3>
+<table><tr><th>Assessment</th><th>Mark</th><th>Out of</th></tr>
+$rows
+</table>
+<p>$sparkline</p>
+<h3>Class final grades</h3>
+<p>$histogram</p>
+</body></html>
+""")
+
+# Set in each worker by _init_worker so the class data is sent once per process.
+_CLASS = {}
+
+
+def _init_worker(class_data):
+    _CLASS.update(class_data)
+
+
+def _max_mark(column):
+    """Return what an assessment column is marked out of (10 or 100)."""
+    return 100 // grading.ASSESSMENT_WEIGHTS[grading.assessment_kind(column)][1]
+
+
+def _sparkline(percentages, width=160, height=30):
+    """Return an inline SVG line of the student's marks as percentages."""
+    points = [p for p in percentages if not np.isnan(p)]
+    if len(points) < 2:
+        return ""
+    step = width / (len(points) - 1)
+    coords = " ".join(f"{i * step:.1f},{height - p / 100 * height:.1f}" for i, p in enumerate(points))
+    return (f'<svg width="{width}" height="{height}"><polyline points="{coords}" '
+            'fill="none" stroke="steelblue" stroke-width="2"/></svg>')
+
+
+def _histogram_svg(counts, highlight, width=200, height=60):
+    """Return an inline SVG bar chart of the class histogram, marking one bin."""
+    tallest = max(max(counts), 1)
+    bar = width / len(counts)
+    bars = []
+    for i, count in enumerate(counts):
+        bar_height = count / tallest * height
+        colour = "orange" if i == highlight else "skyblue"
+        bars.append(f'<rect x="{i * bar:.1f}" y="{height - bar_height:.1f}" width="{bar - 1:.1f}" '
+                    f'height="{bar_height:.1f}" fill="{colour}"/>')
+    return f'<svg width="{width}" height="{height}">{"".join(bars)}</svg>'
+
+
+def _format(value, spec, suffix=""):
+    """Format a number for a report, or MISSING if it is NaN."""
+    return MISSING if np.isnan(value) else f"{value:{spec}}{suffix}"
+
+
+def _histogram_bin(final):
+    if np.isnan(final):
+        return -1
+    return min(int(np.searchsorted(HISTOGRAM_BINS, final, side="right")) - 1, len(HISTOGRAM_BINS) - 2)
+
+
+def _render_html(student, path):
+    columns = _CLASS["columns"]
+    rows = "\n".join(
+        f"<tr><td>{html.escape(col)}</td><td>{mark:g}</td><td>{_max_mark(col)}</td></tr>"
+        for col, mark in zip(columns, student["marks"]) if not np.isnan(mark))
+    percentages = [mark / _max_mark(col) * 100 for col, mark in zip(columns, student["marks"])]
+    page = PAGE.substitute(
+        name=html.escape(student["name"]),
+        student_id=html.escape(student["id"]),
+        final=_format(student["final"], ".2f", "%"),
+        letter=html.escape(student["letter"]),
+        percentile=_format(student["percentile"], ".0f"),
+        rows=rows,
+        sparkline=_sparkline(percentages),
+        histogram=_histogram_svg(_CLASS["histogram"], _histogram_bin(student["final"])),
+    )
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(page)
+
+
+def _render_pdf(student, path):
+    import matplotlib  # pylint: disable=import-outside-toplevel
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt  # pylint: disable=import-outside-toplevel
+
+    columns = _CLASS["columns"]
+    fig, (text_ax, spark_ax, hist_ax) = plt.subplots(3, 1, figsize=(8.27, 11.69),
+                                                     gridspec_kw={"height_ratios": [3, 1, 2]})
+    text_ax.axis("off")
+    lines = [f"{student['name']}  (ID {student['id']})",
+             f"Final grade: {_format(student['final'], '.2f', '%')} ({student['letter']})",
+             f"Class percentile: {_format(student['percentile'], '.0f')}", ""]
+    lines += [f"{col}: {mark:g} / {_max_mark(col)}"
+              for col, mark in zip(columns, student["marks"]) if not np.isnan(mark)]
+    text_ax.text(0, 1, "\n".join(lines), va="top", family="monospace")
+
+    spark_ax.plot([mark / _max_mark(col) * 100 for col, mark in zip(columns, student["marks"])],
+                  marker="o")
+    spark_ax.set_ylim(0, 100)
+    spark_ax.set_title("Assessments (%)")
+
+    colours = ["skyblue"] * len(_CLASS["histogram"])
+    highlight = _histogram_bin(student["final"])
+    if highlight >= 0:
+        colours[highlight] = "orange"
+    hist_ax.bar(HISTOGRAM_BINS[:-1], _CLASS["histogram"], width=9, align="edge",
+                color=colours, edgecolor="black")
+    hist_ax.set_title("Class Final Grade Distribution")
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def _render(task):
+    student, path, fmt = task
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if fmt == "pdf":
+        _render_pdf(student, path)
+    else:
+        _render_html(student, path)
+    return path
+
+
+def _safe(value):
+    """Make a value usable in a file name, keeping letters from any alphabet."""
+    return re.sub(r"[^\w.-]+", "_", str(value)).strip("_") or "unknown"
+
+
+def _letter(row, final):
+    letter = row.get("Letter_Grade")
+    if isinstance(letter, str) and letter:
+        return letter
+    return MISSING if np.isnan(final) else grading.letter_grade(final)
+
+
+def _unique_paths(paths):
+    """Suffix repeated paths (_2, _3, ...) so no two students share a report file."""
+    seen = set()
+    unique = []
+    for path in paths:
+        base, ext = os.path.splitext(path)
+        candidate, n = path, 1
+        # Compare case-insensitively, as the reports may land on such a file system.
+        while os.path.normpath(candidate).casefold() in seen:
+            n += 1
+            candidate = f"{base}_{n}{ext}"
+        seen.add(os.path.normpath(candidate).casefold())
+        unique.append(candidate)
+    return unique
+
+
+def generate_reports(df, output_template=OUTPUT_TEMPLATE, fmt="html", workers=None,
+                     progress=True):
+    """Render a report card for every row of a results frame. Returns the paths written.
+
+    output_template is formatted with each student's columns (file-name safe)
+    and ext, e.g. "reports/{ID}_{Name}.{ext}". Students whose paths would
+    clash get a numbered suffix, e.g. "reports/1_Ada_2.html".
+    """
+    columns = [col for col in df.columns if grading.assessment_kind(col) is not None]
+    finals = df["Final_Grade"].to_numpy(dtype=np.float64)
+    class_data = {
+        "columns": columns,
+        "histogram": np.histogram(finals[~np.isnan(finals)], bins=HISTOGRAM_BINS)[0].tolist(),
+    }
+    percentiles = curving.percentile_ranks(finals)
+    marks = df[columns].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+
+    students, targets = [], []
+    for i, row in enumerate(df.to_dict("records")):
+        student = {
+            "name": str(row["Name"]),
+            "id": str(row["ID"]),
+            "final": finals[i],
+            "letter": _letter(row, finals[i]),
+            "percentile": percentiles[i],
+            "marks": marks[i].tolist(),
+        }
+        fields = {key: _safe(value) for key, value in row.items()}
+        students.append(student)
+        targets.append(output_template.format(ext=fmt, **fields))
+    tasks = [(student, path, fmt) for student, path in zip(students, _unique_paths(targets))]
+
+    paths = []
+    report_every = max(len(tasks) // 100, 1)
+    with Pool(workers, initializer=_init_worker, initargs=(class_data,)) as pool:
+        for path in pool.imap_unordered(_render, tasks, chunksize=max(len(tasks) // 64, 1)):
+            paths.append(path)
+            if progress and (len(paths) % report_every == 0 or len(paths) == len(tasks)):
+                print(f"\rRendered {len(paths)}/{len(tasks)} reports", end="", flush=True)
+    if progress:
+        print()
+    return paths
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Render per-student report cards.")
+    parser.add_argument("results", nargs="?", default=RESULT_FILE)
+    parser.add_argument("--format", choices=["html", "pdf"], default="html")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default=OUTPUT_TEMPLATE)
+    args = parser.parse_args()
+    written = generate_reports(pd.read_csv(args.results), args.output, args.format, args.workers)
+    print(f"{len(written)} report cards written.")
@@ -0,0 +1,169 @@
+"""Metadata sidecar for roster CSV files.
+
+Next to "students_raw.csv" a "students_raw.csv.meta.json" file records the
+column layout, the dtype of every column, the assessment column groups, the
+row count and a checksum of the CSV. Opening a roster only reads that file;
+the CSV itself is parsed when marks are actually needed, with the recorded
+dtypes so pandas can skip type inference.
+
+The sidecar is checked on open: if the CSV's size and modification time still
+match it is used as is, otherwise the checksum decides whether the content
+really changed, and a stale sidecar is rebuilt.
+"""
+import csv
+import hashlib
+import json
+import os
+import re
+
+import grading
+
+META_SUFFIX = ".meta.json"
+META_VERSION = 1
+# What pandas' C parser reads as int64: no underscores, and within the int64 range.
+_INTEGER = re.compile(r"\s*[+-]?[0-9]+\s*")
+_INT64_RANGE = range(-2 ** 63, 2 ** 63)
+
+
+def meta_path(csv_path):
+    return f"{csv_path}{META_SUFFIX}"
+
+
+def file_checksum(path):
+    """Return the SHA-256 of a file, read in 1 MiB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _infer_dtype(current, value):
+    """Widen a column's dtype (pandas names) to fit one more cell."""
+    if value == "" or current == "object":
+        return current
+    if current in (None, "int64") and _INTEGER.fullmatch(value) \
+            and int(value) in _INT64_RANGE:
+        return current or "int64"
+    if "_" in value:
+        # Python accepts "1_000" as a number, pandas does not.
+        return "object"
+    try:
+        float(value)
+        return "float64"
+    except ValueError:
+        return "object"
+
+
+def build_metadata(csv_path):
+    """Scan a roster CSV once and return its metadata dict."""
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        columns = next(reader, [])
+        dtypes = [None] * len(columns)
+        has_blank = [False] * len(columns)
+        row_count = 0
+        for row in reader:
+            if not row:
+                continue  # pandas skips blank lines
+            row_count += 1
+            for i, value in enumerate(row[:len(columns)]):
+                has_blank[i] = has_blank[i] or value == ""
+                dtypes[i] = _infer_dtype(dtypes[i], value)
+            for i in range(len(row), len(columns)):
+                has_blank[i] = True
+
+    # Like pandas: blank cells turn int columns into floats and empty columns are floats.
+    resolved = {}
+    for column, dtype, blank in zip(columns, dtypes, has_blank):
+        if dtype is None or (dtype == "int64" and blank):
+            dtype = "float64"
+        resolved[column] = dtype
+
+    stat = os.stat(csv_path)
+    groups = {kind: [col for col in columns if grading.assessment_kind(col) == kind]
+              for kind in grading.ASSESSMENT_WEIGHTS}
+    return {
+        "version": META_VERSION,
+        "columns": columns,
+        "dtypes": resolved,
+        "column_groups": groups,
+        "row_count": row_count,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "checksum": file_checksum(csv_path),
+    }
+
+
+def write_metadata(csv_path, metadata=None):
+    """Write (and return) the sidecar for csv_path, building it if not given."""
+    metadata = metadata or build_metadata(csv_path)
+    temp_path = f"{meta_path(csv_path)}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=1)
+    os.replace(temp_path, meta_path(csv_path))
+    return metadata
+
+
+def load_metadata(csv_path):
+    """Return the sidecar for csv_path if it still describes the CSV, else None."""
+    try:
+        with open(meta_path(csv_path), encoding="utf-8") as f:
+            metadata = json.load(f)
+        stat = os.stat(csv_path)
+    except (OSError, ValueError):
+        return None
+    if metadata.get("version") != META_VERSION or metadata.get("size") != stat.st_size:
+        return None
+    if metadata.get("mtime_ns") == stat.st_mtime_ns:
+        return metadata
+    # Touched but maybe not changed: the checksum has the final say.
+    if metadata.get("checksum") != file_checksum(csv_path):
+        return None
+    metadata["mtime_ns"] = stat.st_mtime_ns
+    return write_metadata(csv_path, metadata)
+
+
+class Roster:
+    """A roster CSV opened through its metadata sidecar.
+
+    Column layout and assessment groups come from the sidecar; the CSV is only
+    read by frame().
+    """
+
+    def __init__(self, csv_path):
+        self.path = csv_path
+        self.metadata = load_metadata(csv_path) or write_metadata(csv_path)
+
+    @property
+    def columns(self):
+        return self.metadata["columns"]
+
+    @property
+    def row_count(self):
+        return self.metadata["row_count"]
+
+    @property
+    def assignment_cols(self):
+        return self.metadata["column_groups"]["Assignment"]
+
+    @property
+    def lab_cols(self):
+        return self.metadata["column_groups"]["Lab"]
+
+    @property
+    def test_cols(self):
+        return self.metadata["column_groups"]["Test"]
+
+    def frame(self, usecols=None):
+        """Read the roster into a DataFrame using the recorded dtypes."""
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+        dtypes = self.metadata["dtypes"]
+        if usecols is not None:
+            dtypes = {col: dtypes[col] for col in usecols}
+        return pd.read_csv(self.path, dtype=dtypes, usecols=usecols)
+
+
+def open_roster(csv_path):
+    """Open a roster CSV, reusing or rebuilding its metadata sidecar."""
+    return Roster(csv_path)
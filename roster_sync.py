@@ -0,0 +1,171 @@
+"""Safe concurrent editing of the CSV roster.
+
+Several entry sessions may record marks in the same roster file at once. Each
+session reads the roster together with a version (content hash) for every row.
+When it saves, the roster is re-read under an exclusive lock, the versions of
+the rows being written are checked against the ones the session started from,
+and only those rows are merged into the current file. Rows changed by other
+sessions in the meantime are kept, and a row edited by two sessions at once is
+reported as a conflict instead of being silently overwritten.
+
+Rows are identified by their ID. Rows whose ID is blank or repeated are kept
+in the file untouched, but cannot be edited through save_rows until the
+roster is fixed by hand.
+
+Locks are advisory fcntl locks on a sidecar "<roster>.lock" file, so this
+works between processes on the same machine (POSIX only).
+"""
+import csv
+import fcntl
+import hashlib
+import os
+import tempfile
+from contextlib import contextmanager
+
+KEY_COLUMN = "ID"
+
+
+class RosterConflictError(Exception):
+    """Raised when rows being saved were changed by another session."""
+
+    def __init__(self, keys):
+        self.keys = list(keys)
+        super().__init__(f"Rows changed by another session: {', '.join(self.keys)}")
+
+
+class RosterKeyError(ValueError):
+    """Raised when a row to save cannot be identified by a unique, non-blank ID.
+
+    This includes giving a row an ID that already belongs to another row.
+    """
+
+
+@contextmanager
+def roster_lock(path, shared=False):
+    """Hold an advisory lock on the roster at path for the duration of the block."""
+    with open(f"{path}.lock", "a", encoding="utf-8") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def row_version(header, row):
+    """Return a short content hash identifying this version of a row."""
+    # Empty cells are left out so that another session adding a column does not
+    # change the version of every row.
+    values = "\x1f".join(f"{column}={row[column]}" for column in header if row.get(column))
+    return hashlib.sha1(values.encode("utf-8")).hexdigest()
+
+
+def _read(path):
+    """Read the roster without locking. Returns (header, list of row dicts in file order)."""
+    if not os.path.exists(path):
+        return [], []
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        header = list(reader.fieldnames or [])
+        rows = list(reader)
+    return header, rows
+
+
+def _index(rows):
+    """Return ({ID: position} for IDs on exactly one row, set of IDs on several rows)."""
+    positions, repeated = {}, set()
+    for position, row in enumerate(rows):
+        key = (row.get(KEY_COLUMN) or "").strip()
+        if not key:
+            continue
+        if key in positions:
+            repeated.add(key)
+        positions[key] = position
+    for key in repeated:
+        del positions[key]
+    return positions, repeated
+
+
+def _write(path, header, rows):
+    """Atomically replace the roster with header and rows."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".roster-", suffix=".csv")
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=header, restval="")
+            writer.writeheader()
+            writer.writerows(rows)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def read_roster(path):
+    """Read the roster under a shared lock.
+
+    Returns (header, rows, versions) where rows maps each student ID to a dict
+    of column values and versions maps each ID to its row_version. Rows with a
+    blank or repeated ID are left out of both, as they cannot be saved.
+    """
+    with roster_lock(path, shared=True):
+        header, rows = _read(path)
+    positions, _ = _index(rows)
+    keyed = {key: rows[position] for key, position in positions.items()}
+    return header, keyed, {key: row_version(header, row) for key, row in keyed.items()}
+
+
+def _check_key(key, repeated):
+    if not key.strip():
+        raise RosterKeyError("Cannot save a row with a blank ID")
+    if key in repeated:
+        raise RosterKeyError(f"ID {key} appears on several rows of the roster; "
+                             "fix the duplicates before editing it")
+
+
+def save_rows(path, changes, base_versions):
+    """Merge changed rows into the roster, checking they were not edited meanwhile.
+
+    changes maps the ID a row had when it was read (or a new ID) to a dict of
+    the columns to set; columns not mentioned keep their current values, and
+    new columns are appended to the header. base_versions maps the same IDs to
+    the version read earlier, or None for rows that did not exist yet.
+
+    Raises RosterConflictError without writing anything if any of the rows no
+    longer has its base version, and RosterKeyError if an ID is blank, appears
+    on more than one row or would be given to a second row. Returns the new
+    versions of the saved rows.
+    """
+    with roster_lock(path):
+        header, rows = _read(path)
+        positions, repeated = _index(rows)
+        conflicts, new_keys = [], set()
+        for key, values in changes.items():
+            new_key = str(values.get(KEY_COLUMN, key))
+            _check_key(key, repeated)
+            _check_key(new_key, repeated)
+            if new_key in new_keys or (new_key != key
+                                       and (new_key in positions or new_key in changes)):
+                raise RosterKeyError(f"ID {new_key} already belongs to another student")
+            new_keys.add(new_key)
+            current = row_version(header, rows[positions[key]]) if key in positions else None
+            if current != base_versions.get(key):
+                conflicts.append(key)
+        if conflicts:
+            raise RosterConflictError(conflicts)
+
+        for values in changes.values():
+            header.extend(column for column in values if column not in header)
+        saved = {}
+        for key, values in changes.items():
+            if key in positions:
+                row = dict(rows[positions[key]])
+            else:
+                row = {KEY_COLUMN: key}
+                positions[key] = len(rows)
+                rows.append(row)
+            row.update({column: "" if value is None else str(value)
+                        for column, value in values.items()})
+            rows[positions[key]] = row
+            saved[row[KEY_COLUMN]] = row
+        _write(path, header, rows)
+    return {key: row_version(header, row) for key, row in saved.items()}
@@ -0,0 +1,178 @@
+"""Term-sharded grade archive.
+
+Instead of one student_grades.db holding every term, each term gets its own
+SQLite file (terms/grades_<term>.db) with the usual schema, so the active
+term's database stays small and old terms are never rewritten or vacuumed.
+
+Questions that span terms are written once against a "{db}" schema
+placeholder and run on every term, either in parallel with one connection per
+term file or through ATTACH DATABASE on a single connection, and the rows are
+merged in term order.
+
+Example:
+    archive = TermArchive()
+    conn = archive.connect("2025-S2")   # active term, created on first use
+    archive.student_history(2024000001)
+"""
+import os
+import re
+import sqlite3
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import database
+
+ARCHIVE_DIR = "terms"
+# SQLite's default limit on databases attached to one connection.
+MAX_ATTACHED = 10
+_TERM_NAME = re.compile(r"^[A-Za-z0-9_-]+$")
+_TERM_FILE = re.compile(r"^grades_([A-Za-z0-9_-]+)\.db$")
+
+
+def _read_only_uri(path):
+    return f"file:{urllib.request.pathname2url(os.path.abspath(path))}?mode=ro"
+
+
+class TermArchive:
+    """A directory of per-term grade databases."""
+
+    def __init__(self, directory=ARCHIVE_DIR, workers=None):
+        self.directory = directory
+        self.workers = workers
+
+    def term_path(self, term):
+        """Return the database file for a term."""
+        if not _TERM_NAME.match(term):
+            raise ValueError(f"Invalid term name '{term}': use letters, digits, '-' and '_'")
+        return os.path.join(self.directory, f"grades_{term}.db")
+
+    def terms(self):
+        """Return the archived terms, sorted by name."""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(match.group(1) for match in map(_TERM_FILE.match, os.listdir(self.directory))
+                      if match)
+
+    def connect(self, term):
+        """Open (creating if needed) the database for a term, e.g. the active one."""
+        os.makedirs(self.directory, exist_ok=True)
+        conn = database.create_connection(self.term_path(term))
+        if conn is not None:
+            database.create_tables(conn)
+            database.populate_courses(conn)
+        return conn
+
+    def import_database(self, db_file, term):
+        """Copy an existing single-file database (such as DB_FILE) into the archive as a term.
+
+        The copy is upgraded to the current schema and its course summary rebuilt,
+        so it can be queried like any other term.
+        """
+        path = self.term_path(term)
+        if os.path.exists(path):
+            raise FileExistsError(f"Term '{term}' already exists at {path}")
+        os.makedirs(self.directory, exist_ok=True)
+        # The backup API copies a consistent snapshot even if db_file is in use.
+        source = sqlite3.connect(_read_only_uri(db_file), uri=True)
+        target = sqlite3.connect(path)
+        try:
+            source.backup(target)
+            # Databases from before the summary table and change log need them added.
+            database.create_tables(target)
+            database.rebuild_course_summary(target)
+        except sqlite3.Error:
+            target.close()
+            os.remove(path)
+            raise
+        finally:
+            target.close()
+            source.close()
+        return path
+
+    def _select_terms(self, terms):
+        available = self.terms()
+        if terms is None:
+            return available
+        missing = [term for term in terms if term not in available]
+        if missing:
+            raise ValueError(f"Unknown term(s): {', '.join(missing)}")
+        return sorted(terms)
+
+    @contextmanager
+    def attached(self, terms):
+        """Attach up to MAX_ATTACHED term files read-only to one in-memory connection.
+
+        Yields (conn, {term: schema name}) and detaches everything on exit.
+        """
+        if len(terms) > MAX_ATTACHED:
+            raise ValueError(f"At most {MAX_ATTACHED} terms can be attached at once")
+        conn = sqlite3.connect(":memory:", uri=True)
+        schemas = {}
+        try:
+            for i, term in enumerate(terms):
+                schema = f"term_{i}"
+                conn.execute("ATTACH DATABASE ? AS " + schema,
+                             (_read_only_uri(self.term_path(term)),))
+                schemas[term] = schema
+            yield conn, schemas
+        finally:
+            for schema in schemas.values():
+                conn.execute("DETACH DATABASE " + schema)
+            conn.close()
+
+    def _query_term(self, term, sql, params):
+        conn = sqlite3.connect(_read_only_uri(self.term_path(term)), uri=True)
+        try:
+            return [(term,) + row for row in conn.execute(sql.format(db="main"), params)]
+        finally:
+            conn.close()
+
+    def query(self, sql, params=(), terms=None, parallel=True):
+        """Run sql on every term and return the merged rows, each prefixed with its term.
+
+        sql must name tables as "{db}.table". With parallel (the default) each
+        term is queried on its own connection in a thread pool; otherwise the
+        terms are attached MAX_ATTACHED at a time and queried with UNION ALL.
+        Rows come back grouped by term, in term order.
+        """
+        terms = self._select_terms(terms)
+        if parallel:
+            with ThreadPoolExecutor(self.workers) as pool:
+                results = pool.map(lambda term: self._query_term(term, sql, params), terms)
+                return [row for rows in results for row in rows]
+
+        rows = []
+        for start in range(0, len(terms), MAX_ATTACHED):
+            group = terms[start:start + MAX_ATTACHED]
+            with self.attached(group) as (conn, schemas):
+                union = " UNION ALL ".join(
+                    f"SELECT ? AS term, * FROM ({sql.format(db=schemas[term])})"
+                    for term in group)
+                union_params = [value for term in group for value in (term,) + tuple(params)]
+                rows.extend(conn.execute(union, union_params).fetchall())
+        return rows
+
+    def student_history(self, student_id, terms=None, parallel=True):
+        """Return (term, course, assessment_type, score) for every mark a student has."""
+        return self.query("""
+            SELECT c.name, g.assessment_type, g.score
+            FROM {db}.grades AS g JOIN {db}.courses AS c ON c.id = g.course_id
+            WHERE g.student_id = ?
+            ORDER BY c.name, g.id
+        """, (student_id,), terms, parallel)
+
+    def course_trend(self, course_name, terms=None, parallel=True):
+        """Return (term, assessment_type, mark count, average) for a course in every term.
+
+        Read from each term's student_course_summary, so the cost per term is
+        proportional to its students rather than its marks.
+        """
+        return self.query("""
+            SELECT s.assessment_type, SUM(s.mark_count), SUM(s.mark_sum) / SUM(s.mark_count)
+            FROM {db}.student_course_summary AS s JOIN {db}.courses AS c ON c.id = s.course_id
+            WHERE c.name = ?
+            GROUP BY s.assessment_type
+            HAVING SUM(s.mark_count) > 0
+            ORDER BY s.assessment_type
+        """, (course_name,), terms, parallel)
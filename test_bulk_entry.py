@@ -0,0 +1,62 @@
+import unittest
+
+import bulk_entry  # The module we're testing
+
+MARK_COLUMNS = ["Assignment1", "Lab1", "Test1", "Exam"]
+
+class TestBulkEntry(unittest.TestCase):
+
+    def test_valid_block(self):
+        """Test parsing tab- and comma-separated rows into numeric marks."""
+        raw, columns, errors = bulk_entry.parse_block(
+            "Ada\t1\t8\t9\t70\t60\nBen,2,10,10,90,80.5\n", MARK_COLUMNS)
+        self.assertEqual(errors, [])
+        self.assertEqual(columns, ["Name", "ID"] + MARK_COLUMNS)
+
+        valid, errors = bulk_entry.validate_block(raw)
+        self.assertEqual(errors, [])
+        self.assertEqual(valid["ID"].tolist(), ["1", "2"])
+        self.assertEqual(valid["Exam"].tolist(), [60.0, 80.5])
+
+    def test_all_errors_are_reported_together(self):
+        """Test that every bad field and row is reported and only good rows are kept."""
+        raw, _, errors = bulk_entry.parse_block(
+            "Ada,1,8,9,70,60\n"
+            "Cy,3,11,9,x,\n"
+            "Dee,4,1,2,3,4\n"
+            "Dee,4,1,2,3,4\n"
+            "Eve,5\n", MARK_COLUMNS)
+        self.assertEqual(errors, ["Line 5: expected 6 fields, got 2"])
+
+        valid, errors = bulk_entry.validate_block(raw)
+        self.assertEqual(valid["Name"].tolist(), ["Ada"])
+        self.assertEqual(errors, [
+            "Line 2, Assignment1: '11' is out of range (0-10)",
+            "Line 2, Test1: 'x' is not a number (0-100)",
+            "Line 2, Exam: '' is missing (0-100)",
+            "Line 3: ID 4 appears more than once",
+            "Line 4: ID 4 appears more than once",
+        ])
+
+    def test_header_sets_column_order(self):
+        """Test that a header line picks and orders the mark columns."""
+        raw, columns, errors = bulk_entry.parse_block("Name,ID,Exam,Lab1\nAda,1,60,9\n",
+                                                      MARK_COLUMNS)
+        self.assertEqual(errors, [])
+        self.assertEqual(columns, ["Name", "ID", "Exam", "Lab1"])
+        valid, errors = bulk_entry.validate_block(raw)
+        self.assertEqual(errors, [])
+        self.assertEqual(valid.iloc[0].to_dict(), {"Name": "Ada", "ID": "1", "Exam": 60, "Lab1": 9})
+
+    def test_header_name_in_any_case(self):
+        """Test that a lower-case "name" header is read as the Name column, not a mark."""
+        raw, columns, errors = bulk_entry.parse_block("name,ID,Exam\nAda,1,60\n", MARK_COLUMNS)
+        self.assertEqual(errors, [])
+        self.assertEqual(columns, ["Name", "ID", "Exam"])
+        valid, errors = bulk_entry.validate_block(raw)
+        self.assertEqual(errors, [])
+        self.assertEqual(valid.iloc[0].to_dict(), {"Name": "Ada", "ID": "1", "Exam": 60})
+
+
+if __name__ == '__main__':
+    unittest.main()
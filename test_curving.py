@@ -0,0 +1,46 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import curving  # The module we're testing
+
+class TestCurving(unittest.TestCase):
+
+    def test_quantiles_match_numpy_percentile(self):
+        """Test the selection-based quantiles against np.percentile."""
+        values = np.random.default_rng(0).uniform(0, 100, 501)
+        percents = [0, 20, 40, 70, 90, 100]
+        np.testing.assert_allclose(curving.quantiles(values, percents),
+                                   np.percentile(values, percents))
+
+    def test_percentile_ranks_and_z_scores(self):
+        """Test percentile ranks (ties share a rank) and z-scores."""
+        ranks = curving.percentile_ranks([10, 20, 20, 40])
+        np.testing.assert_allclose(ranks, [12.5, 50.0, 50.0, 87.5])
+        np.testing.assert_allclose(curving.z_scores([1, 2, 3]), [-1.0, 0.0, 1.0])
+
+    def test_curve_per_course(self):
+        """Test that each course is banded relative to its own students."""
+        df = pd.DataFrame({
+            'Course': ['X'] * 10 + ['Y'] * 10,
+            'Final_Grade': list(range(50, 60)) + list(range(90, 100)),
+        })
+        curving.curve(df, course_col='Course')
+        for course in ('X', 'Y'):
+            letters = df.loc[df['Course'] == course, 'Curved_Grade'].tolist()
+            self.assertEqual(letters, ['F', 'F', 'D', 'D', 'C', 'C', 'C', 'B', 'B', 'A'])
+
+    def test_course_curve_over_sections(self):
+        """Test that streamed sections are ranked against the whole course."""
+        course = curving.CourseCurve()
+        course.add([50, 60, 70])
+        course.add([80, 90])
+        section = course.apply([90])
+        self.assertEqual(section['Curved_Grade'].tolist(), ['A'])
+        self.assertAlmostEqual(section['Percentile'][0], 90.0)
+        self.assertAlmostEqual(course.std, np.std([50, 60, 70, 80, 90], ddof=1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,5 @@
+import io
+import json
 import unittest
 import sqlite3
 import database  # The module we're testing
@@ -72,6 +74,208 @@ class TestDatabase(unittest.TestCase):
         self.assertEqual(grades[0][0], assessment)
         self.assertEqual(grades[0][1], score)
 
+    def test_summary_tracks_inserts_updates_and_deletes(self):
+        """Test that the summary table follows changes to the grades table."""
+        database.add_student(self.conn, 2024000001, "Test Student", "Other")
+        first = database.add_grade(self.conn, 2024000001, 1, "Test1", 60.0)
+        database.add_grade(self.conn, 2024000001, 1, "Test1", 80.0)
+
+        averages = database.get_student_course_averages(self.conn, 2024000001, 1)
+        self.assertEqual(averages, [("Test1", 2, 70.0)])
+
+        self.conn.execute("UPDATE grades SET score=? WHERE id=?", (100.0, first))
+        averages = database.get_student_course_averages(self.conn, 2024000001, 1)
+        self.assertEqual(averages, [("Test1", 2, 90.0)])
+
+        self.conn.execute("DELETE FROM grades")
+        count = self.conn.execute("SELECT COUNT(*) FROM student_course_summary").fetchone()[0]
+        self.assertEqual(count, 0, "Summary rows should be removed with their last mark.")
+
+    def test_final_grades_and_statistics_from_summary(self):
+        """Test final grades and class statistics computed from the summary table."""
+        for student_id, (assignment, lab, test, exam) in {
+                1: (8.0, 9.0, 70.0, 60.0),
+                2: (10.0, 10.0, 90.0, 80.0)}.items():
+            database.add_student(self.conn, student_id, f"Student {student_id}", "Other")
+            database.add_grade(self.conn, student_id, 1, "Assignment1", assignment)
+            database.add_grade(self.conn, student_id, 1, "Lab1", lab)
+            database.add_grade(self.conn, student_id, 1, "Test1", test)
+            database.add_grade(self.conn, student_id, 1, "Exam", exam)
+
+        finals = database.get_final_grades(self.conn, 1)
+        self.assertAlmostEqual(finals[1], 80 * 0.15 + 90 * 0.15 + 70 * 0.30 + 60 * 0.40)
+        self.assertAlmostEqual(finals[2], 100 * 0.15 + 100 * 0.15 + 90 * 0.30 + 80 * 0.40)
+
+        stats = database.get_course_statistics(self.conn, 1)
+        count, mean, stdev = stats["Test1"]
+        self.assertEqual(count, 2)
+        self.assertAlmostEqual(mean, 80.0)
+        self.assertAlmostEqual(stdev, 200 ** 0.5)
+
+    def test_rebuild_course_summary(self):
+        """Test rebuilding the summary for a database whose summary is missing."""
+        database.add_student(self.conn, 2024000001, "Test Student", "Other")
+        database.add_grade(self.conn, 2024000001, 1, "Lab1", 7.0)
+        self.conn.execute("DELETE FROM student_course_summary")
+
+        database.rebuild_course_summary(self.conn)
+
+        averages = database.get_student_course_averages(self.conn, 2024000001, 1)
+        self.assertEqual(averages, [("Lab1", 1, 7.0)])
+
+    def test_iter_students_pages_through_all_rows(self):
+        """Test that keyset pagination returns every student once, in id order."""
+        for student_id in range(1, 8):
+            database.add_student(self.conn, student_id, f"Student {student_id}", "Other")
+
+        students = list(database.iter_students(self.conn, batch_size=3))
+        self.assertEqual([row[0] for row in students], list(range(1, 8)))
+
+        resumed = list(database.iter_students(self.conn, batch_size=3, after_id=5))
+        self.assertEqual([row[0] for row in resumed], [6, 7])
+
+    def test_streaming_grade_apis(self):
+        """Test the streaming grade readers against the list-based one."""
+        database.add_student(self.conn, 2024000001, "Test Student", "Other")
+        for number in range(1, 6):
+            database.add_grade(self.conn, 2024000001, 1, f"Test{number}", 50.0 + number)
+        database.add_grade(self.conn, 2024000001, 2, "Exam", 70.0)
+
+        streamed = list(database.stream_grades_for_student_course(
+            self.conn, 2024000001, 1, batch_size=2))
+        self.assertEqual(streamed, database.get_grades_for_student_course(self.conn, 2024000001, 1))
+
+        chunks = list(database.iter_grade_chunks(self.conn, batch_size=2, course_id=1))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual(len(list(database.iter_grades(self.conn, batch_size=4))), 6)
+
+    def test_grade_chunks_with_null_ids(self):
+        """Test that NULL student and course ids come back masked in NumPy chunks."""
+        database.add_grade(self.conn, 2024000001, 1, "Exam", 70.0)
+        database.add_grade(self.conn, None, 1, "Exam", 60.0)
+        database.add_grade(self.conn, 2024000001, None, "Exam", 50.0)
+
+        chunk, = database.iter_grade_chunks(self.conn, as_="numpy")
+        self.assertEqual(chunk["student_id"].tolist(), [2024000001, None, 2024000001])
+        self.assertEqual(chunk["course_id"].tolist(), [1, 1, None])
+        self.assertEqual(chunk["score"].tolist(), [70.0, 60.0, 50.0])
+
+    def test_batch_size_must_be_positive(self):
+        """Test that the paginated readers reject a batch size below 1."""
+        for batch_size in (0, -1):
+            with self.assertRaises(ValueError):
+                list(database.iter_students(self.conn, batch_size=batch_size))
+            with self.assertRaises(ValueError):
+                list(database.iter_grades(self.conn, batch_size=batch_size))
+            with self.assertRaises(ValueError):
+                list(database.iter_changes(self.conn, batch_size=batch_size))
+
+    def test_batch_grade_lookup_matches_single_lookups(self):
+        """Test that the batch lookup returns the same marks as per-pair queries."""
+        old_limit = database.MAX_IN_PARAMS
+        database.MAX_IN_PARAMS = 2  # Force the JSON array path as well.
+        try:
+            for student_id in range(1, 5):
+                database.add_student(self.conn, student_id, f"Student {student_id}", "Other")
+                for course_id in (1, 2, 3):
+                    database.add_grade(self.conn, student_id, course_id, "Test1", 10.0 * student_id)
+                    database.add_grade(self.conn, student_id, course_id, "Exam", 20.0 + course_id)
+
+            grades = database.get_grades_for_students_courses(self.conn, [1, 2, 3], [1, 3])
+        finally:
+            database.MAX_IN_PARAMS = old_limit
+
+        self.assertEqual(set(grades), {(s, c) for s in (1, 2, 3) for c in (1, 3)})
+        for (student_id, course_id), marks in grades.items():
+            self.assertEqual(marks, database.get_grades_for_student_course(
+                self.conn, student_id, course_id))
+        self.assertEqual(database.get_grades_for_students_courses(self.conn, [], [1]), {})
+
+    def test_large_batch_lookup_leaves_no_open_transaction(self):
+        """Test that a lookup above MAX_IN_PARAMS does not hold a lock on the database."""
+        database.add_student(self.conn, 1, "Ada", "Female")
+        database.add_grade(self.conn, 1, 1, "Exam", 70.0)
+        student_ids = range(1, database.MAX_IN_PARAMS + 100)
+
+        grades = database.get_grades_for_students_courses(self.conn, student_ids)
+        self.assertEqual(grades, {(1, 1): [("Exam", 70.0)]})
+        self.assertFalse(self.conn.in_transaction)
+
+    def test_assessment_catalog_and_wide_marks(self):
+        """Test catalogued assessments, range-checked marks and on-demand wide views."""
+        lab = database.add_assessment(self.conn, 1, "Lab1")
+        exam = database.add_assessment(self.conn, 1, "Exam", weight=0.5)
+        self.assertEqual(database.get_assessments(self.conn, 1),
+                         [(lab, "Lab1", "Lab", 10, None), (exam, "Exam", "Exam", 100, 0.5)])
+        self.assertIsNone(database.add_assessment(self.conn, 1, "Lab1"),
+                          "Assessment names should be unique per course.")
+
+        database.add_student(self.conn, 1, "Ada", "Female")
+        database.add_student(self.conn, 2, "Ben", "Male")
+        database.record_mark(self.conn, 1, lab, 7.0)
+        database.record_mark(self.conn, 1, exam, 65.0)
+        database.record_mark(self.conn, 2, exam, 80.0)
+        self.assertIsNone(database.record_mark(self.conn, 2, lab, 11.0),
+                          "Marks above max_mark should be rejected.")
+
+        self.assertEqual(database.get_wide_marks(self.conn, 1),
+                         {1: {"Lab1": 7.0, "Exam": 65.0}, 2: {"Exam": 80.0}})
+        self.assertEqual(database.get_wide_marks(self.conn, 1, ["Exam"]),
+                         {1: {"Exam": 65.0}, 2: {"Exam": 80.0}})
+
+    def test_final_grades_use_catalog_kind_max_mark_and_weight(self):
+        """Test that catalogued assessments are graded by their catalog entry."""
+        midterm = database.add_assessment(self.conn, 1, "Midterm", kind="Test", weight=0.5)
+        quiz = database.add_assessment(self.conn, 1, "Quiz", kind="Test", max_mark=20)
+        exam = database.add_assessment(self.conn, 1, "Exam")
+        self.assertIsNone(database.add_assessment(self.conn, 1, "Project"),
+                          "Names without a kind or weight should be rejected.")
+
+        database.add_student(self.conn, 1, "Ada", "Female")
+        database.record_mark(self.conn, 1, midterm, 90.0)
+        database.record_mark(self.conn, 1, quiz, 15.0)
+        database.record_mark(self.conn, 1, exam, 50.0)
+        database.add_grade(self.conn, 1, 1, "Test1", 55.0)  # Not catalogued.
+
+        finals = database.get_final_grades(self.conn, 1)
+        self.assertAlmostEqual(finals[1], 90 * 0.5 + (75 + 55) / 2 * 0.30 + 50 * 0.40)
+
+    def test_change_log_records_inserts_updates_and_deletes(self):
+        """Test that student and grade changes are logged in order."""
+        database.add_student(self.conn, 1, "Ada", "Female")
+        grade_id = database.add_grade(self.conn, 1, 1, "Exam", 50.0)
+        self.conn.execute("UPDATE grades SET score=? WHERE id=?", (65.0, grade_id))
+        self.conn.execute("DELETE FROM grades WHERE id=?", (grade_id,))
+
+        changes = list(database.iter_changes(self.conn, batch_size=2))
+        self.assertEqual([change["seq"] for change in changes], [1, 2, 3, 4])
+        self.assertEqual([(c["table"], c["op"]) for c in changes],
+                         [("students", "insert"), ("grades", "insert"),
+                          ("grades", "update"), ("grades", "delete")])
+        self.assertEqual(changes[0]["data"], {"id": 1, "name": "Ada", "sex": "Female"})
+        self.assertEqual(changes[2]["data"]["score"], 65.0)
+        self.assertIsNone(changes[3]["data"])
+
+    def test_export_changes_since_cursor_and_compaction(self):
+        """Test incremental JSONL export, compacted export and log compaction."""
+        database.add_student(self.conn, 1, "Ada", "Female")
+        grade_id = database.add_grade(self.conn, 1, 1, "Exam", 50.0)
+        self.conn.execute("UPDATE grades SET score=? WHERE id=?", (65.0, grade_id))
+
+        out = io.StringIO()
+        cursor = database.export_changes_jsonl(self.conn, out, since=1, compact=True)
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(cursor, 3)
+        self.assertEqual([line["seq"] for line in lines], [3])
+
+        out = io.StringIO()
+        self.assertEqual(database.export_changes_jsonl(self.conn, out, since=cursor), 3)
+        self.assertEqual(out.getvalue(), "", "Nothing new after the last cursor.")
+
+        self.assertEqual(database.compact_change_log(self.conn), 1)
+        remaining = [change["seq"] for change in database.iter_changes(self.conn)]
+        self.assertEqual(remaining, [1, 3])
+
 
 if __name__ == '__main__':
     unittest.main()
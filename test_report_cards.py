@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+import report_cards  # The module we're testing
+
+class TestReportCards(unittest.TestCase):
+
+    def test_generate_html_reports(self):
+        """Test that one report per student is written from the output template."""
+        df = pd.DataFrame({
+            'Name': ["Ada Lovelace", "Ben"],
+            'ID': [1, 2],
+            'Assignment1': [8, 10],
+            'Lab1': [9, 10],
+            'Test1': [70, 90],
+            'Exam': [60, 80],
+            'Final_Grade': [70.5, 89.0],
+            'Letter_Grade': ['B', 'A'],
+        })
+        with tempfile.TemporaryDirectory() as tmpdir:
+            template = os.path.join(tmpdir, "{ID}", "{Name}.{ext}")
+            paths = report_cards.generate_reports(df, template, workers=2, progress=False)
+
+            self.assertEqual(sorted(paths), [os.path.join(tmpdir, "1", "Ada_Lovelace.html"),
+                                             os.path.join(tmpdir, "2", "Ben.html")])
+            with open(paths[0] if "Ada" in paths[0] else paths[1], encoding="utf-8") as f:
+                page = f.read()
+        self.assertIn("Final grade: 70.50% (B)", page)
+        self.assertIn("Class percentile: 25", page)
+        self.assertIn("<td>Lab1</td><td>9</td><td>10</td>", page)
+
+    def test_clashing_paths_and_missing_grades(self):
+        """Test that students never share a report file and a missing grade shows a dash."""
+        df = pd.DataFrame({
+            'Name': ["José", "Jos?", "Ben", "Ben"],
+            'ID': [1, 1, 2, 2],
+            'Exam': [60, 80, 70, float("nan")],
+            'Final_Grade': [60.0, 80.0, 70.0, float("nan")],
+        })
+        with tempfile.TemporaryDirectory() as tmpdir:
+            template = os.path.join(tmpdir, "{ID}_{Name}.{ext}")
+            paths = report_cards.generate_reports(df, template, workers=2, progress=False)
+
+            self.assertEqual(sorted(os.listdir(tmpdir)),
+                             ["1_Jos.html", "1_José.html", "2_Ben.html", "2_Ben_2.html"])
+            self.assertEqual(len(set(paths)), 4)
+            with open(os.path.join(tmpdir, "2_Ben_2.html"), encoding="utf-8") as f:
+                page = f.read()
+        self.assertIn(f"Final grade: {report_cards.MISSING} ({report_cards.MISSING})", page)
+        self.assertIn(f"Class percentile: {report_cards.MISSING}", page)
+        self.assertNotIn("nan", page)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+
+import roster_meta  # The module we're testing
+
+class TestRosterMeta(unittest.TestCase):
+
+    def setUp(self):
+        """Write a small roster in a temporary directory for each test."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "students_raw.csv")
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("Name,ID,Assignment1,Lab1,Lab2,Test1,Exam,LabNotes\n"
+                    "Ada,1,8,9,,70,60.5,ok\n"
+                    "Ben,2,10,10,7,90,80,\n")
+
+    def tearDown(self):
+        """Remove the temporary roster and sidecar."""
+        self.tmpdir.cleanup()
+
+    def test_metadata_layout_and_dtypes(self):
+        """Test the recorded columns, dtypes and prefix-based column groups."""
+        roster = roster_meta.open_roster(self.path)
+        self.assertTrue(os.path.exists(roster_meta.meta_path(self.path)))
+        self.assertEqual(roster.row_count, 2)
+        self.assertEqual(roster.assignment_cols, ["Assignment1"])
+        self.assertEqual(roster.lab_cols, ["Lab1", "Lab2"], "LabNotes is not a lab.")
+        self.assertEqual(roster.metadata["dtypes"], {
+            "Name": "object", "ID": "int64", "Assignment1": "int64", "Lab1": "int64",
+            "Lab2": "float64", "Test1": "int64", "Exam": "float64", "LabNotes": "object",
+        })
+
+    def test_blank_lines_are_not_rows(self):
+        """Test that blank lines, which pandas skips, do not count or widen dtypes."""
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("Name,ID,Lab1,Exam\nAda,1,5,60\n\nBen,2,6,70\n\n")
+        roster = roster_meta.open_roster(self.path)
+        self.assertEqual(roster.row_count, 2)
+        self.assertEqual(roster.metadata["dtypes"],
+                         {"Name": "object", "ID": "int64", "Lab1": "int64", "Exam": "int64"})
+        self.assertEqual(roster.frame()["ID"].tolist(), [1, 2])
+
+    def test_dtypes_match_what_pandas_can_parse(self):
+        """Test that Python-only integer spellings and huge integers are not recorded as int64."""
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("Name,ID,Lab1,Exam\nAda,1_000,5,9223372036854775808\nBen,2, 6 ,+70\n")
+        roster = roster_meta.open_roster(self.path)
+        self.assertEqual(roster.metadata["dtypes"],
+                         {"Name": "object", "ID": "object", "Lab1": "int64", "Exam": "float64"})
+        frame = roster.frame()
+        self.assertEqual(frame["Lab1"].tolist(), [5, 6])
+        self.assertEqual(frame["Exam"].iloc[1], 70.0)
+
+    def test_sidecar_is_reused_until_the_roster_changes(self):
+        """Test that an unchanged roster reuses its sidecar and a changed one is rebuilt."""
+        first = roster_meta.open_roster(self.path).metadata
+        os.utime(self.path, ns=(first["mtime_ns"] + 10 ** 9, first["mtime_ns"] + 10 ** 9))
+        self.assertEqual(roster_meta.load_metadata(self.path)["checksum"], first["checksum"],
+                         "Touching the file without changing it should keep the sidecar.")
+
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("Cy,3,5,4,3,40,50,\n")
+        self.assertIsNone(roster_meta.load_metadata(self.path))
+        self.assertEqual(roster_meta.open_roster(self.path).row_count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+
+import roster_sync  # The module we're testing
+
+class TestRosterSync(unittest.TestCase):
+
+    def setUp(self):
+        """Create a small roster in a temporary directory for each test."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "students_raw.csv")
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("Name,ID,Lab1,Exam\nAda,1,5,60\nBen,2,6,70\n")
+
+    def tearDown(self):
+        """Remove the temporary roster."""
+        self.tmpdir.cleanup()
+
+    def test_concurrent_edits_to_different_rows_are_merged(self):
+        """Test that two sessions editing different students both keep their changes."""
+        _, _, first_versions = roster_sync.read_roster(self.path)
+        _, _, second_versions = roster_sync.read_roster(self.path)
+
+        roster_sync.save_rows(self.path, {"1": {"Exam": 90.0}}, {"1": first_versions["1"]})
+        roster_sync.save_rows(self.path, {"2": {"Lab1": 9.0, "Lab2": 8.0}},
+                              {"2": second_versions["2"]})
+
+        header, rows, _ = roster_sync.read_roster(self.path)
+        self.assertEqual(header, ["Name", "ID", "Lab1", "Exam", "Lab2"])
+        self.assertEqual(rows["1"]["Exam"], "90.0")
+        self.assertEqual(rows["2"]["Lab1"], "9.0")
+        self.assertEqual(rows["2"]["Exam"], "70", "Untouched columns should be kept.")
+
+    def test_concurrent_edit_of_same_row_conflicts(self):
+        """Test that a stale version is rejected instead of overwriting newer marks."""
+        _, _, versions = roster_sync.read_roster(self.path)
+        roster_sync.save_rows(self.path, {"1": {"Exam": 90.0}}, {"1": versions["1"]})
+
+        with self.assertRaises(roster_sync.RosterConflictError):
+            roster_sync.save_rows(self.path, {"1": {"Exam": 10.0}}, {"1": versions["1"]})
+        _, rows, _ = roster_sync.read_roster(self.path)
+        self.assertEqual(rows["1"]["Exam"], "90.0")
+
+    def test_new_student_is_appended(self):
+        """Test adding a student that was not in the roster when it was read."""
+        roster_sync.save_rows(self.path, {"3": {"Name": "Cy", "ID": "3", "Exam": 55}}, {"3": None})
+        _, rows, _ = roster_sync.read_roster(self.path)
+        self.assertEqual(list(rows), ["1", "2", "3"])
+        self.assertEqual(rows["3"]["Lab1"], "")
+
+        with self.assertRaises(roster_sync.RosterConflictError):
+            roster_sync.save_rows(self.path, {"3": {"Name": "Cy", "ID": "3"}}, {"3": None})
+
+    def test_id_of_another_student_is_a_key_error(self):
+        """Test that giving a row another student's ID is not reported as a conflict."""
+        _, _, versions = roster_sync.read_roster(self.path)
+        with self.assertRaises(roster_sync.RosterKeyError):
+            roster_sync.save_rows(self.path, {"1": {"Name": "Ada", "ID": "2"}},
+                                  {"1": versions["1"]})
+        with self.assertRaises(roster_sync.RosterKeyError):
+            roster_sync.save_rows(self.path, {"1": {"ID": "3"}, "3": {"Name": "Cy", "ID": "3"}},
+                                  {"1": versions["1"], "3": None})
+        _, rows, _ = roster_sync.read_roster(self.path)
+        self.assertEqual(rows["1"]["Name"], "Ada")
+        self.assertNotIn("3", rows)
+
+    def test_rows_with_duplicate_or_blank_ids_are_kept(self):
+        """Test that saving never drops rows sharing an ID or lacking one."""
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write('Name,ID,Exam\nAda,1,60\nBen,1,70\nCy,"",80\nDee,"",90\nEve,5,50\n')
+
+        _, rows, versions = roster_sync.read_roster(self.path)
+        self.assertEqual(list(rows), ["5"], "Only uniquely identified rows can be edited.")
+        roster_sync.save_rows(self.path, {"5": {"Exam": 55.0}}, {"5": versions["5"]})
+        with self.assertRaises(roster_sync.RosterKeyError):
+            roster_sync.save_rows(self.path, {"1": {"Exam": 10.0}}, {"1": None})
+        with self.assertRaises(roster_sync.RosterKeyError):
+            roster_sync.save_rows(self.path, {"": {"Name": "Fay", "Exam": 10.0}}, {"": None})
+
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(f.read().splitlines(), [
+                "Name,ID,Exam", "Ada,1,60", "Ben,1,70", "Cy,,80", "Dee,,90", "Eve,5,55.0"])
+
+
+if __name__ == '__main__':
+    unittest.main()
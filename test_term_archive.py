@@ -0,0 +1,99 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+import database
+import term_archive  # The module we're testing
+
+class TestTermArchive(unittest.TestCase):
+
+    def setUp(self):
+        """Create an archive with two terms in a temporary directory."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.archive = term_archive.TermArchive(os.path.join(self.tmpdir.name, "terms"))
+        for term, exam in (("2024-S1", 60.0), ("2024-S2", 80.0)):
+            conn = self.archive.connect(term)
+            database.add_student(conn, 1, "Ada", "Female")
+            database.add_student(conn, 2, "Ben", "Male")
+            database.add_grade(conn, 1, 1, "Exam", exam)
+            database.add_grade(conn, 2, 1, "Exam", exam + 10)
+            database.add_grade(conn, 1, 2, "Test1", 50.0)
+            conn.close()
+
+    def tearDown(self):
+        """Remove the archive."""
+        self.tmpdir.cleanup()
+
+    def test_terms_are_separate_files(self):
+        """Test that each term has its own database file."""
+        self.assertEqual(self.archive.terms(), ["2024-S1", "2024-S2"])
+        self.assertTrue(os.path.exists(self.archive.term_path("2024-S2")))
+        with self.assertRaises(ValueError):
+            self.archive.term_path("../escape")
+
+    def test_student_history_across_terms(self):
+        """Test that a student's marks from every term are merged in term order."""
+        expected = [
+            ("2024-S1", "EEE2019", "Test1", 50.0),
+            ("2024-S1", "MAT2110", "Exam", 60.0),
+            ("2024-S2", "EEE2019", "Test1", 50.0),
+            ("2024-S2", "MAT2110", "Exam", 80.0),
+        ]
+        self.assertEqual(self.archive.student_history(1), expected)
+        self.assertEqual(self.archive.student_history(1, parallel=False), expected,
+                         "The ATTACH path should match the parallel path.")
+
+    def test_course_trend_from_summaries(self):
+        """Test course averages per term, optionally limited to some terms."""
+        self.assertEqual(self.archive.course_trend("MAT2110"),
+                         [("2024-S1", "Exam", 2, 65.0), ("2024-S2", "Exam", 2, 85.0)])
+        self.assertEqual(self.archive.course_trend("MAT2110", terms=["2024-S2"], parallel=False),
+                         [("2024-S2", "Exam", 2, 85.0)])
+
+    def test_import_database_while_it_is_in_use(self):
+        """Test importing a single-file database that has an uncommitted write open."""
+        db_file = os.path.join(self.tmpdir.name, "student_grades.db")
+        conn = database.create_connection(db_file)
+        database.create_tables(conn)
+        database.populate_courses(conn)
+        database.add_student(conn, 1, "Ada", "Female")
+        database.add_grade(conn, 1, 1, "Exam", 70.0)
+        conn.execute("INSERT INTO students (id, name, sex) VALUES (2, 'Ben', 'Male')")
+
+        try:
+            self.archive.import_database(db_file, "2023-S2")
+        finally:
+            conn.close()
+        self.assertEqual(self.archive.student_history(1, terms=["2023-S2"]),
+                         [("2023-S2", "MAT2110", "Exam", 70.0)])
+        self.assertEqual(self.archive.query("SELECT COUNT(*) FROM {db}.students",
+                                            terms=["2023-S2"]), [("2023-S2", 1)],
+                         "Only committed rows should be imported.")
+        with self.assertRaises(FileExistsError):
+            self.archive.import_database(db_file, "2023-S2")
+
+    def test_import_database_with_the_original_schema(self):
+        """Test that a database from before the summary table is upgraded on import."""
+        db_file = os.path.join(self.tmpdir.name, "student_grades.db")
+        conn = sqlite3.connect(db_file)
+        conn.executescript("""
+            CREATE TABLE students (id INTEGER PRIMARY KEY, name TEXT NOT NULL, sex TEXT);
+            CREATE TABLE courses (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL UNIQUE);
+            CREATE TABLE grades (id INTEGER PRIMARY KEY AUTOINCREMENT, student_id INTEGER,
+                                 course_id INTEGER, assessment_type TEXT NOT NULL,
+                                 score REAL NOT NULL);
+            INSERT INTO students VALUES (1, 'Ada', 'Female'), (2, 'Ben', 'Male');
+            INSERT INTO courses (name) VALUES ('MAT2110');
+            INSERT INTO grades (student_id, course_id, assessment_type, score)
+            VALUES (1, 1, 'Exam', 60), (2, 1, 'Exam', 80);
+        """)
+        conn.close()
+
+        self.archive.import_database(db_file, "2023-S1")
+        self.assertEqual(self.archive.course_trend("MAT2110", terms=["2023-S1"]),
+                         [("2023-S1", "Exam", 2, 70.0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
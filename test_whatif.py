@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+
+import grading
+import whatif  # The module we're testing
+
+class TestWhatIf(unittest.TestCase):
+
+    def setUp(self):
+        """Write a small roster and build its mark matrix."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        csv_path = os.path.join(self.tmpdir.name, "students_raw.csv")
+        with open(csv_path, "w", encoding="utf-8") as f:
+            f.write("Name,ID,Assignment1,Lab1,Test1,Exam\n"
+                    "Ada,1,8,9,70,60\n"
+                    "Ben,2,10,10,90,80\n"
+                    "Cy,3,5,4,40,\n")
+        self.marks = whatif.MarkMatrix.from_csv(csv_path)
+
+    def tearDown(self):
+        """Remove the roster and matrix files."""
+        del self.marks
+        self.tmpdir.cleanup()
+
+    def test_final_grades_match_grading_rules(self):
+        """Test that the default weighting reproduces grading.final_grade."""
+        weighting = {kind: weight for kind, (weight, _) in grading.ASSESSMENT_WEIGHTS.items()}
+        finals = self.marks.final_grades([weighting])[:, 0]
+        expected = [
+            grading.final_grade({"Assignment": 80, "Lab": 90, "Test": 70, "Exam": 60}),
+            grading.final_grade({"Assignment": 100, "Lab": 100, "Test": 90, "Exam": 80}),
+            grading.final_grade({"Assignment": 50, "Lab": 40, "Test": 40}),
+        ]
+        for actual, wanted in zip(finals, expected):
+            self.assertAlmostEqual(float(actual), wanted, places=4)
+
+    def test_evaluate_every_weighting_and_cutoff_set(self):
+        """Test letter distributions for each weighting and cutoff combination."""
+        results = self.marks.evaluate([{"Exam": 1.0}, {"Test": 1.0}],
+                                      [grading.GRADE_CUTOFFS, [(60, 'P')]])
+        self.assertEqual(len(results), 4)
+        self.assertEqual(results[0]["distribution"], {'A': 1, 'B': 0, 'C': 1, 'D': 0, 'F': 1})
+        self.assertEqual(results[1]["distribution"], {'P': 2, 'F': 1})
+        self.assertEqual(results[2]["distribution"], {'A': 1, 'B': 1, 'C': 0, 'D': 0, 'F': 1})
+
+    def test_blank_lines_and_quoted_newlines_are_not_students(self):
+        """Test that the matrix has exactly one row per parsed student."""
+        csv_path = os.path.join(self.tmpdir.name, "messy.csv")
+        with open(csv_path, "w", encoding="utf-8") as f:
+            f.write('Name,ID,Test1,Exam\n"Ada\nLovelace",1,60,60\n\nBen,2,90,80\n\n\n')
+        marks = whatif.MarkMatrix.from_csv(csv_path)
+        self.assertEqual(len(marks), 2)
+        result = marks.evaluate([{"Test": 0.5, "Exam": 0.5}])[0]
+        self.assertEqual(result["distribution"], {'A': 1, 'B': 0, 'C': 1, 'D': 0, 'F': 0})
+        del marks
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+"""What-if regrading on a memory-mapped matrix of marks.
+
+The cohort's marks are stored once as a float32 .npy file (students x
+assessments) that is memory-mapped on open, together with a small JSON file
+listing the assessment columns. Candidate weightings and letter cutoffs are
+then evaluated with one matrix multiply per block of students, without
+re-running the pandas pipeline in process_and_save.
+
+Example:
+    marks = MarkMatrix.from_csv("students_raw.csv")
+    results = marks.evaluate(
+        [{"Assignment": 0.15, "Lab": 0.15, "Test": 0.30, "Exam": 0.40},
+         {"Assignment": 0.10, "Lab": 0.10, "Test": 0.30, "Exam": 0.50}],
+        [grading.GRADE_CUTOFFS, [(75, 'A'), (65, 'B'), (55, 'C'), (45, 'D')]])
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+import grading
+
+KINDS = list(grading.ASSESSMENT_WEIGHTS)
+# Students processed per matrix multiply, bounding the working memory.
+BLOCK_ROWS = 1 << 16
+
+
+def _columns_path(matrix_path):
+    return f"{matrix_path}.columns.json"
+
+
+class MarkMatrix:
+    """A memory-mapped students x assessments matrix of raw marks.
+
+    Missing marks are stored as NaN. kind_index maps each assessment kind to
+    the column positions that belong to it.
+    """
+
+    def __init__(self, matrix_path):
+        self.path = matrix_path
+        self.marks = np.load(matrix_path, mmap_mode="r")
+        with open(_columns_path(matrix_path), encoding="utf-8") as f:
+            self.columns = json.load(f)
+        self.kind_index = {
+            kind: np.array([i for i, col in enumerate(self.columns)
+                            if grading.assessment_kind(col) == kind], dtype=np.intp)
+            for kind in KINDS
+        }
+        # Assessments x kinds indicator, so per-kind sums are a single matmul.
+        self._kind_matrix = np.zeros((len(self.columns), len(KINDS)), dtype=np.float32)
+        for k, kind in enumerate(KINDS):
+            self._kind_matrix[self.kind_index[kind], k] = 1.0
+
+    @classmethod
+    def from_csv(cls, csv_path, matrix_path=None, chunksize=BLOCK_ROWS):
+        """Build the matrix file from a roster CSV and open it.
+
+        The CSV is read in chunks (once to count the rows, once for the marks)
+        and written straight into the memory map, so the roster never has to
+        fit in memory at once.
+        """
+        matrix_path = matrix_path or f"{csv_path}.marks.npy"
+        header = pd.read_csv(csv_path, nrows=0).columns
+        columns = [col for col in header if grading.assessment_kind(col) is not None]
+        # Count the rows pandas will parse (blank lines and quoted newlines make raw
+        # line counts wrong), so the matrix has no phantom or missing students.
+        num_rows = sum(len(chunk) for chunk in
+                       pd.read_csv(csv_path, usecols=[0], chunksize=chunksize))
+
+        marks = np.lib.format.open_memmap(matrix_path, mode="w+", dtype=np.float32,
+                                          shape=(num_rows, len(columns)))
+        start = 0
+        for chunk in pd.read_csv(csv_path, usecols=columns, chunksize=chunksize):
+            block = chunk[columns].apply(pd.to_numeric, errors="coerce").to_numpy(np.float32)
+            marks[start:start + len(block)] = block
+            start += len(block)
+        if start != num_rows:
+            raise ValueError(f"{csv_path} changed while building the mark matrix "
+                             f"({start} rows read, {num_rows} expected)")
+        marks.flush()
+        del marks
+
+        with open(_columns_path(matrix_path), "w", encoding="utf-8") as f:
+            json.dump(columns, f)
+        return cls(matrix_path)
+
+    def __len__(self):
+        return self.marks.shape[0]
+
+    def kind_averages(self, start=0, stop=None):
+        """Return a (students x kinds) array of average marks scaled to percentages.
+
+        Kinds a student has no marks for are 0, matching grading.final_grade.
+        """
+        block = np.asarray(self.marks[start:stop], dtype=np.float32)
+        present = ~np.isnan(block)
+        sums = np.where(present, block, 0.0) @ self._kind_matrix
+        counts = present.astype(np.float32) @ self._kind_matrix
+        with np.errstate(invalid="ignore", divide="ignore"):
+            averages = np.where(counts > 0, sums / counts, 0.0)
+        scales = np.array([grading.ASSESSMENT_WEIGHTS[kind][1] for kind in KINDS],
+                          dtype=np.float32)
+        return averages * scales
+
+    def final_grades(self, weightings, start=0, stop=None):
+        """Return a (students x scenarios) array of final grades, one column per weighting."""
+        weights = np.array([[weighting.get(kind, 0.0) for weighting in weightings]
+                            for kind in KINDS], dtype=np.float32)
+        return self.kind_averages(start, stop) @ weights
+
+    def evaluate(self, weightings, cutoff_sets=None):
+        """Return letter-grade distributions for every weighting and cutoff set.
+
+        weightings is a list of {kind: weight} dicts and cutoff_sets a list of
+        cutoff lists in the format of grading.GRADE_CUTOFFS (defaulting to
+        just that one). Every combination is evaluated; the result is a list of
+        dicts with "weighting", "cutoffs" and "distribution" ({letter: count},
+        'F' being everything below the lowest cutoff) in weighting-major order.
+        """
+        cutoff_sets = cutoff_sets or [grading.GRADE_CUTOFFS]
+        ordered = [sorted(cutoffs) for cutoffs in cutoff_sets]
+        thresholds = [np.array([cutoff for cutoff, _ in cutoffs], dtype=np.float32)
+                      for cutoffs in ordered]
+        counts = [np.zeros((len(weightings), len(bounds) + 1), dtype=np.int64)
+                  for bounds in thresholds]
+        offsets = np.arange(len(weightings))
+
+        for start in range(0, max(len(self), 1), BLOCK_ROWS):
+            finals = self.final_grades(weightings, start, start + BLOCK_ROWS)
+            for bounds, totals in zip(thresholds, counts):
+                # Band 0 is below every cutoff; band i is at or above the i-th lowest.
+                bands = np.searchsorted(bounds, finals, side="right")
+                width = len(bounds) + 1
+                totals += np.bincount((bands + offsets * width).ravel(),
+                                      minlength=len(weightings) * width).reshape(-1, width)
+
+        results = []
+        for s, weighting in enumerate(weightings):
+            for cutoffs, totals in zip(ordered, counts):
+                letters = ['F'] + [letter for _, letter in cutoffs]
+                results.append({
+                    "weighting": weighting,
+                    "cutoffs": cutoffs[::-1],
+                    "distribution": dict(zip(letters[::-1], totals[s, ::-1].tolist())),
+                })
+        return results